@@ -388,6 +388,25 @@ def add_hpc_arguments(parser):
         action="store_true",
         help="Submit job to HPC cluster instead of running locally"
     )
+    hpc_submit.add_argument(
+        "--hpc-submit-sleep",
+        type=float,
+        default=1.0,
+        help="Minimum delay in seconds between two job submissions, to avoid "
+             "overloading the scheduler (default: 1.0)"
+    )
+    hpc_submit.add_argument(
+        "--hpc-bwlimit",
+        type=int,
+        default=None,
+        help="Bandwidth limit in KiB/s when pushing Apptainer images to the HPC "
+             "and in the printed download command (default: unlimited)"
+    )
+    hpc_submit.add_argument(
+        "--hpc-force",
+        action="store_true",
+        help="Submit jobs even for participants whose outputs already exist on the HPC"
+    )
     
     hpc_auth = parser.add_argument_group(
         f'{Colors.BOLD}HPC Authentication{Colors.END}'
@@ -414,6 +433,12 @@ def add_hpc_arguments(parser):
         type=str,
         help="ProxyJump gateway hostname (optional, e.g., gwceci.ulb.ac.be)"
     )
+    hpc_auth.add_argument(
+        "--hpc-cipher",
+        type=str,
+        help="SSH cipher list for HPC connections, in ssh_config 'Ciphers' syntax "
+             "(default: prefer aes128-gcm@openssh.com)"
+    )
     
     hpc_paths = parser.add_argument_group(
         f'{Colors.BOLD}HPC Paths{Colors.END}'
@@ -434,6 +459,12 @@ def add_hpc_arguments(parser):
         type=str,
         help="Path to apptainer images directory on HPC (default: $GLOBALSCRATCH/apptainer on cluster)"
     )
+    hpc_paths.add_argument(
+        "--hpc-apptainer-cachedir",
+        type=str,
+        help="Shared Apptainer layer cache used when building images on HPC "
+             "(default: $GLOBALSCRATCH/apptainer_cache on cluster)"
+    )
     hpc_paths.add_argument(
         "--hpc-fs-license",
         type=str,
@@ -458,21 +489,44 @@ def add_hpc_arguments(parser):
     hpc_resources.add_argument(
         "--hpc-mem",
         type=str,
-        default="32G",
-        help="HPC memory allocation (default: 32G)"
+        default=None,
+        help="HPC memory allocation (default: per tool, e.g. 16G for freesurfer, 32G for qsiprep)"
     )
     hpc_resources.add_argument(
         "--hpc-cpus",
         type=int,
-        default=8,
-        help="Number of CPUs to request (default: 8)"
+        default=None,
+        help="Number of CPUs to request (default: per tool, e.g. 4 for freesurfer, 8 for fmriprep)"
     )
     hpc_resources.add_argument(
         "--hpc-gpus",
         type=int,
-        default=1,
+        default=None,
         help="Number of GPUs to request (default: 1, only for GPU-capable tools)"
     )
+    hpc_resources.add_argument(
+        "--hpc-array-concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of tasks of a SLURM array job running at once (default: 4)"
+    )
+    hpc_resources.add_argument(
+        "--hpc-cpu-freq",
+        type=str,
+        default=None,
+        metavar="FREQ",
+        help="CPU frequency or governor for the job, e.g. 'performance', 'high' or a value "
+             "in kHz (passed to #SBATCH --cpu-freq; the tool then runs under srun)"
+    )
+    hpc_resources.add_argument(
+        "--hpc-sbatch-option",
+        dest="hpc_sbatch_options",
+        action="append",
+        metavar="KEY=VALUE",
+        help="Extra or overriding #SBATCH directive, e.g. qos=long or constraint=skylake "
+             "(can be repeated; CPUs, memory, CPU frequency, array, job name and log files "
+             "are set through their own flags or by ln2t_tools)"
+    )
 
 
 def parse_args() -> argparse.Namespace:
@@ -1,7 +1,7 @@
 import os
 import logging
 import shutil
-from typing import Optional, List, Dict
+from typing import Optional, List
 from pathlib import Path
 import re
 from datetime import datetime
@@ -15,7 +15,9 @@ from ln2t_tools.utils.utils import (
     ensure_image_exists,
     check_file_exists,
     check_participants_exist,
+    get_bids_layout,
     get_flair_list,
+    get_additional_contrasts,
     launch_apptainer,
     build_apptainer_cmd,
     get_freesurfer_output,
@@ -25,6 +27,7 @@ from ln2t_tools.utils.utils import (
     create_meld_config_json,
     create_meld_dataset_description,
     prepare_meld_input_symlinks,
+    prepare_meld_input_symlinks_batch,
     download_meld_weights,
     get_dataset_initials
 )
@@ -37,12 +40,13 @@ from ln2t_tools.tools.bids_validator import BidsValidatorTool
 from ln2t_tools.utils.hpc import (
     submit_hpc_job,
     submit_multiple_jobs,
+    filter_completed_participants,
     validate_hpc_config,
-    check_required_data,
+    check_required_data_many,
     print_download_command,
     check_apptainer_image_exists_on_hpc,
     get_hpc_image_build_command,
-    prompt_apptainer_build,
+    prompt_apptainer_build_many,
     start_ssh_control_master,
     test_ssh_connection,
 )
@@ -76,47 +80,9 @@ logger = logging.getLogger(__name__)
 
 def get_available_datasets(rawdata_dir: str) -> List[str]:
     """Get list of available BIDS datasets in the rawdata directory."""
-    return [name[:-8] for name in os.listdir(rawdata_dir) 
-            if name.endswith("-rawdata")]
-
-
-
-
-def get_additional_contrasts(
-    layout: BIDSLayout,
-    participant_label: str,
-    session: Optional[str] = None,
-    run: Optional[str] = None
-) -> Dict[str, Optional[str]]:
-    """Get T2w and FLAIR images for a subject if they exist.
-    
-    Args:
-        layout: BIDSLayout object
-        participant_label: Subject ID
-        session: Optional session ID
-        run: Optional run number
-        
-    Returns:
-        Dictionary with T2w and FLAIR file paths
-    """
-    filters = {
-        'subject': participant_label,
-        'scope': 'raw',
-        'extension': '.nii.gz',
-        'session': session,
-        'run': run
-    }
-    
-    # Remove None values from filters
-    filters = {k: v for k, v in filters.items() if v is not None}
-    
-    t2w = layout.get(suffix='T2w', return_type='filename', **filters)
-    flair = layout.get(suffix='FLAIR', return_type='filename', **filters)
-    
-    return {
-        't2w': t2w[0] if t2w else None,
-        'flair': flair[0] if flair else None
-    }
+    with os.scandir(rawdata_dir) as entries:
+        return [entry.name[:-8] for entry in entries
+                if entry.name.endswith("-rawdata") and entry.is_dir()]
 
 
 def handle_hpc_status(args):
@@ -129,8 +95,9 @@ def handle_hpc_status(args):
     """
     from ln2t_tools.utils.hpc_status import (
         load_all_jobs, get_jobs_for_dataset, get_jobs_for_tool,
-        check_job_status, JobStatus
+        check_jobs_status, JobStatus
     )
+    from ln2t_tools.utils.hpc import ssh_control_master
     
     hpc_status_arg = getattr(args, 'hpc_status', None)
     
@@ -198,23 +165,25 @@ def handle_hpc_status(args):
     
     can_query = username and hostname
     
-    for job_info in jobs_to_check:
-        status = None
-        details = {'state': job_info.state}
-        
-        # Try to get live status if we have HPC credentials
-        if can_query:
-            try:
-                status, details = check_job_status(
-                    job_info.job_id,
+    # Try to get live status if we have HPC credentials (one query for all jobs)
+    live_statuses = {}
+    if can_query:
+        try:
+            # The queries run in batch mode, so open the connection first
+            # (this is where a key passphrase can be asked for)
+            with ssh_control_master(username, hostname, keyfile, gateway):
+                live_statuses = check_jobs_status(
+                    [job_info.job_id for job_info in jobs_to_check],
                     username,
                     hostname,
                     keyfile,
                     gateway
                 )
-            except Exception as e:
-                logger.debug(f"Could not query live status for job {job_info.job_id}: {e}")
-                status = None
+        except Exception as e:
+            logger.debug(f"Could not query live job status: {e}")
+    
+    for job_info in jobs_to_check:
+        status, details = live_statuses.get(job_info.job_id, (None, {'state': job_info.state}))
         
         # Use local status if live query failed
         if status is None:
@@ -1419,7 +1388,8 @@ def process_meldgraph_subject(
             print_download_command(
                 tool="meld_graph",
                 dataset=args.dataset,
-                args=args
+                args=args,
+                job_ids=[job_id]
             )
         else:
             # HPC submission failed - raise error to stop processing
@@ -1619,12 +1589,11 @@ def process_meld_harmonization(
     create_meld_dataset_description(meld_config_dir, args.dataset)
     
     # Prepare input for all participants
-    for participant_label in participant_labels:
-        prepare_meld_input_symlinks(
-            meld_data_dir / "input",
-            layout,
-            participant_label
-        )
+    prepare_meld_input_symlinks_batch(
+        meld_data_dir / "input",
+        layout,
+        participant_labels
+    )
     
     # Copy demographics file to MELD data directory (if not already there)
     demo_dest = meld_data_dir / demographics_file.name
@@ -1837,7 +1806,7 @@ def main(args=None) -> None:
             try:
                 dataset_rawdata = Path(DEFAULT_RAWDATA) / f"{dataset}-rawdata"
                 if dataset_rawdata.exists():
-                    layout = BIDSLayout(dataset_rawdata)
+                    layout = get_bids_layout(dataset_rawdata)
                     participant_list = args.participant_label if args.participant_label else []
                     participant_list = check_participants_exist(layout, participant_list)
                     all_participants.update([f"sub-{p}" for p in participant_list])
@@ -1868,6 +1837,9 @@ def main(args=None) -> None:
         # Track processing results
         successful_datasets = []
         failed_datasets = []
+        # Apptainer images missing on the HPC, (tool, version) -> dataset; the
+        # build is offered once all datasets have been looked at
+        missing_hpc_images = {}
 
         # Process each dataset
         for dataset in datasets_to_process:
@@ -1929,7 +1901,7 @@ def main(args=None) -> None:
                         # Get participant list from --participant-label arguments
                         participant_list = args.participant_label if args.participant_label else []
                         
-                        layout = BIDSLayout(dataset_rawdata)
+                        layout = get_bids_layout(dataset_rawdata)
                         participant_list = check_participants_exist(layout, participant_list)
                         if not participant_list:
                             logger.error(
@@ -2014,7 +1986,8 @@ def main(args=None) -> None:
                                 print_download_command(
                                     tool="meld_graph",
                                     dataset=dataset,
-                                    args=args
+                                    args=args,
+                                    job_ids=[job_id]
                                 )
                                 successful_datasets.append(dataset)
                             else:
@@ -2043,7 +2016,7 @@ def main(args=None) -> None:
                     list_missing_subjects(dataset_rawdata, output_dir)
                     continue
 
-                layout = BIDSLayout(dataset_rawdata)
+                layout = get_bids_layout(dataset_rawdata)
                 
                 # Get participants to process (use getattr for tools that don't have participant_label)
                 participant_label_arg = getattr(args, 'participant_label', None)
@@ -2106,16 +2079,11 @@ def main(args=None) -> None:
                             )
 
                             if not image_ok:
-                                # Prompt user to build the image
-                                build_submitted = prompt_apptainer_build(
-                                    tool=tool,
-                                    version=version,
-                                    dataset=dataset,
-                                    args=args
-                                )
-                                
-                                # Whether user submitted a build job or saved script locally,
-                                # we cannot proceed without the image
+                                # Collect the image; building it is offered after the
+                                # loop so several images can go in one array job.
+                                # Either way we cannot proceed without the image.
+                                logger.warning(f"Apptainer image for {tool} {version} not found on HPC")
+                                missing_hpc_images.setdefault((tool, version), dataset)
                                 dataset_success = False
                                 continue
 
@@ -2137,24 +2105,29 @@ def main(args=None) -> None:
                             hpc_rawdata = getattr(args, 'hpc_rawdata', None) or '$GLOBALSCRATCH/rawdata'
                             hpc_derivatives = getattr(args, 'hpc_derivatives', None) or '$GLOBALSCRATCH/derivatives'
                             
-                            # Check required data on HPC for each participant
-                            all_data_ready = True
-                            for participant_label in participant_list:
-                                data_ready = check_required_data(
-                                    tool=tool,
-                                    dataset=dataset,
-                                    participant_label=participant_label,
-                                    args=args,
-                                    username=username,
-                                    hostname=hostname,
-                                    keyfile=keyfile,
-                                    gateway=gateway,
-                                    hpc_rawdata=hpc_rawdata,
-                                    hpc_derivatives=hpc_derivatives
-                                )
-                                if not data_ready:
-                                    all_data_ready = False
-                                    break
+                            # Leave out participants already processed on the HPC
+                            hpc_participants = filter_completed_participants(
+                                tool, dataset, participant_list, args, version=version
+                            )
+                            if not hpc_participants:
+                                logger.info(f"All participants already have {tool} outputs on HPC, nothing to submit")
+                                successful_datasets.append(dataset)
+                                continue
+                            
+                            # Check required data on HPC for all participants concurrently
+                            data_checks = check_required_data_many(
+                                tool=tool,
+                                dataset=dataset,
+                                participant_labels=hpc_participants,
+                                args=args,
+                                username=username,
+                                hostname=hostname,
+                                keyfile=keyfile,
+                                gateway=gateway,
+                                hpc_rawdata=hpc_rawdata,
+                                hpc_derivatives=hpc_derivatives
+                            )
+                            all_data_ready = all(data_ready for _, data_ready in data_checks)
                             
                             if not all_data_ready:
                                 logger.error("Required data not available on HPC. Skipping this tool.")
@@ -2164,7 +2137,7 @@ def main(args=None) -> None:
                             # Submit jobs for all participants in parallel
                             job_ids = submit_multiple_jobs(
                                 tool=tool,
-                                participant_labels=participant_list,
+                                participant_labels=hpc_participants,
                                 dataset=dataset,
                                 args=args
                             )
@@ -2179,7 +2152,8 @@ def main(args=None) -> None:
                                     tool=tool,
                                     dataset=dataset,
                                     args=args,
-                                    job_ids=job_ids
+                                    job_ids=job_ids,
+                                    participant_labels=hpc_participants
                                 )
                                 
                                 successful_datasets.append(dataset)
@@ -2316,6 +2290,10 @@ def main(args=None) -> None:
                 # Continue with next dataset instead of failing completely
                 continue
 
+        # Offer to build the Apptainer images that are missing on the HPC
+        if missing_hpc_images:
+            prompt_apptainer_build_many(missing_hpc_images, args)
+
         # Report final results
         if len(datasets_to_process) == 1:
             # Single dataset case
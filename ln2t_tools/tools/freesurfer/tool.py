@@ -386,20 +386,15 @@ Typical runtime: 6-12 hours per subject
             'subject': participant_label,
             'scope': 'raw',
             'extension': '.nii.gz',
-            'return_type': 'filename'
         }
         if session:
             filters['session'] = session
         
-        # Look for T2w
-        t2w_files = layout.get(suffix='T2w', **filters)
-        if t2w_files:
-            contrasts['t2w'] = t2w_files[0]
-        
-        # Look for FLAIR
-        flair_files = layout.get(suffix='FLAIR', **filters)
-        if flair_files:
-            contrasts['flair'] = flair_files[0]
+        # Look for T2w and FLAIR in one query (results are sorted by path)
+        for bids_file in layout.get(suffix=['T2w', 'FLAIR'], **filters):
+            key = bids_file.entities['suffix'].lower()
+            if contrasts[key] is None:
+                contrasts[key] = bids_file.path
         
         return contrasts
     
@@ -26,5 +26,19 @@ DEFAULT_CVRMAP_FMRIPREP_VERSION = "21.0.4"  # CVRmap uses fMRIPrep preprocessed
 DEFAULT_MRI2PRINT_VERSION = "2.0.0"
 DEFAULT_BIDS_VALIDATOR_VERSION = "1.14.11"
 
+# Docker Hub owner of each tool's image; Apptainer images are named
+# <owner>.<tool>.<version>.sif
+TOOL_DOCKER_OWNERS = {
+    "freesurfer": "freesurfer",
+    "fastsurfer": "deepmi",
+    "fmriprep": "nipreps",
+    "qsiprep": "pennlinc",
+    "qsirecon": "pennlinc",
+    "meld_graph": "meldproject",
+    "cvrmap": "ln2t",
+    "mri2print": "ln2t",
+    "bids_validator": "bids",
+}
+
 # FreeSurfer license
 DEFAULT_FS_LICENSE = Path("/opt/freesurfer/.license")
\ No newline at end of file
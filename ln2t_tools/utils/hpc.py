@@ -4,13 +4,22 @@ Supports SLURM-based HPC clusters with configurable connection settings.
 """
 
 import atexit
+import contextlib
+import functools
+import hashlib
+import json
 import logging
 import os
 import re
+import shlex
+import shutil
 import subprocess
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Callable
 import tempfile
 
 from ln2t_tools.cli.cli import (
@@ -24,6 +33,16 @@ from ln2t_tools.cli.cli import (
 )
 
 from ln2t_tools.cli import Colors
+from ln2t_tools.utils.defaults import (
+    TOOL_DOCKER_OWNERS,
+    DEFAULT_FS_VERSION,
+    DEFAULT_FASTSURFER_VERSION,
+    DEFAULT_FMRIPREP_VERSION,
+    DEFAULT_QSIPREP_VERSION,
+    DEFAULT_QSIRECON_VERSION,
+    DEFAULT_MELDGRAPH_VERSION,
+    DEFAULT_CVRMAP_VERSION
+)
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +50,109 @@ logger = logging.getLogger(__name__)
 _ssh_control_path: Optional[str] = None
 _ssh_control_process: Optional[subprocess.Popen] = None
 
+# Cipher preference for HPC connections. The default only moves AES-GCM
+# (hardware accelerated on most CPUs) to the front of OpenSSH's own list, so
+# negotiation still succeeds on sites that disallow it; --hpc-cipher overrides.
+_DEFAULT_SSH_CIPHERS = "^aes128-gcm@openssh.com"
+_ssh_ciphers: str = _DEFAULT_SSH_CIPHERS
+
+# Host alias of the generated SSH config (see _get_ssh_config)
+_SSH_HOST_ALIAS = "ln2t-hpc"
+# Settings whose SSH config this process has written
+_ssh_configs_written: set = set()
+_ssh_config_lock = threading.Lock()
+
+# Variable references ($VAR or ${VAR}) in HPC paths, resolved remotely once each
+_ENV_VAR_PATTERN = re.compile(r'\$(?:\{(\w+)\}|(\w+))')
+_remote_env_lock = threading.Lock()
+
+# Serializes interactive prompts when checks run in worker threads
+_prompt_lock = threading.Lock()
+
+# Serializes remote directory listings so concurrent checks share one call
+_listing_lock = threading.Lock()
+
+# Time of the last sbatch submission, used to throttle bursts of submissions
+_last_submit_ts: float = 0.0
+_submit_lock = threading.Lock()
+
+
+# SLURM script for building an Apptainer image on the HPC, rendered with
+# str.format_map in generate_apptainer_build_script
+_APPTAINER_BUILD_TEMPLATE = """#!/bin/bash
+#SBATCH --job-name={job_name}
+#SBATCH --cpus-per-task=4
+#SBATCH --time=4:00:00
+#SBATCH --mem=32G
+#SBATCH --output={job_name}_%j.out
+#SBATCH --error={job_name}_%j.err
+{extra_directives}
+# Propagate apptainer's exit status through the tee pipe below
+set -o pipefail
+
+# Apptainer Build Job
+# ===================
+# Tool: {tool}
+# Version: {version}
+# Docker URI: {docker_uri}
+# Output: {remote_path}
+
+{task_setup}echo "Job started at: $(date)"
+echo "Running on node: $(hostname)"
+echo "Job ID: $SLURM_JOB_ID"
+
+# Create output directory if needed
+mkdir -p {hpc_apptainer_dir}
+
+# Set temporary directory for build (use local scratch if available)
+if [ -d "$LOCALSCRATCH" ]; then
+    export APPTAINER_TMPDIR="$LOCALSCRATCH"
+    echo "Using LOCALSCRATCH for temp: $APPTAINER_TMPDIR"
+elif [ -d "/tmp" ]; then
+    export APPTAINER_TMPDIR="/tmp/$USER/apptainer_build_$$"
+    mkdir -p "$APPTAINER_TMPDIR"
+    echo "Using /tmp for temp: $APPTAINER_TMPDIR"
+fi
+
+# Keep the layer cache on shared scratch so later builds reuse common base layers
+export APPTAINER_CACHEDIR="{apptainer_cachedir}"
+mkdir -p "$APPTAINER_CACHEDIR"
+echo "Using layer cache: $APPTAINER_CACHEDIR"
+
+# Build the image
+echo ""
+echo "Building Apptainer image..."
+echo "  Source: {docker_uri}"
+echo "  Target: {remote_path}"
+echo ""
+
+# Line-buffered and teed to a log so progress is visible (and a stalled
+# build can be cancelled) while the job is still running
+stdbuf -oL apptainer build "{remote_path}" "{docker_uri}" 2>&1 | tee -a "$SLURM_SUBMIT_DIR/{log_name}"
+
+BUILD_STATUS=${{PIPESTATUS[0]}}
+
+# Cleanup temp directory
+if [ -n "$APPTAINER_TMPDIR" ] && [ -d "$APPTAINER_TMPDIR" ]; then
+    rm -rf "$APPTAINER_TMPDIR"
+fi
+
+if [ $BUILD_STATUS -eq 0 ]; then
+    echo ""
+    echo "✓ Build completed successfully!"
+    echo "  Image saved to: {remote_path}"
+    ls -lh {remote_path}
+else
+    echo ""
+    echo "✗ Build failed with exit code: $BUILD_STATUS"
+fi
+
+echo ""
+echo "Job finished at: $(date)"
+
+exit $BUILD_STATUS
+"""
+
 
 def _get_control_path() -> str:
     """Get or create the SSH ControlMaster socket path."""
@@ -44,6 +166,18 @@ def _get_control_path() -> str:
 def _cleanup_ssh_control():
     """Cleanup SSH ControlMaster connection on exit."""
     global _ssh_control_process, _ssh_control_path
+    if _ssh_control_path and Path(_ssh_control_path).exists():
+        # A master may have been spawned implicitly by ControlMaster=auto,
+        # so ask whichever process owns the socket to exit. The destination
+        # is ignored since ControlPath contains no tokens.
+        try:
+            subprocess.run(
+                ["ssh", "-o", f"ControlPath={_ssh_control_path}", "-O", "exit", _SSH_HOST_ALIAS],
+                capture_output=True,
+                timeout=5
+            )
+        except Exception:
+            pass
     if _ssh_control_process is not None:
         try:
             _ssh_control_process.terminate()
@@ -62,6 +196,103 @@ def _cleanup_ssh_control():
 atexit.register(_cleanup_ssh_control)
 
 
+def _get_ssh_config(username: str, hostname: str, keyfile: str, gateway: Optional[str] = None) -> str:
+    """Write the SSH config for the HPC host and return its path.
+
+    The host, user, key, ProxyJump and transport options live in one config
+    file instead of being repeated on every ssh, scp and rsync command line.
+    The host is reachable both as ``ln2t-hpc`` and under its own name. The
+    user's ~/.ssh/config and the system-wide config are still read, for
+    every host (including the gateway), for anything not set here. Each set
+    of settings gets its own file (~/.ln2t_tools/ssh_config-<hash>), so
+    concurrent runs against different hosts do not overwrite each other's
+    and printed commands keep pointing at the right host. A file is written
+    once per process.
+
+    Parameters
+    ----------
+    username : str
+        Username for HPC cluster
+    hostname : str
+        Hostname for HPC cluster
+    keyfile : str
+        Path to SSH private key file
+    gateway : Optional[str]
+        ProxyJump gateway hostname
+
+    Returns
+    -------
+    str
+        Path to the SSH config file
+    """
+    keyfile_expanded = str(Path(keyfile).expanduser())
+    key = (username, hostname, keyfile_expanded, gateway, _ssh_ciphers)
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+    config_path = Path.home() / ".ln2t_tools" / f"ssh_config-{digest}"
+
+    with _ssh_config_lock:
+        if key not in _ssh_configs_written or not config_path.exists():
+            lines = [
+                "# Generated by ln2t_tools for these HPC settings",
+                f"Host {_SSH_HOST_ALIAS} {hostname}",
+                f"    HostName {hostname}",
+                f"    User {username}",
+                f"    IdentityFile {keyfile_expanded}",
+            ]
+            if gateway:
+                lines.append(f"    ProxyJump {username}@{gateway}")
+            # Tuned for bulk transfers (uploads, image pushes); multiplexed
+            # sessions inherit the master's cipher and QoS settings. The
+            # keepalives detect a stalled link within 10s rather than
+            # waiting for each command's timeout.
+            lines += [
+                "    ConnectTimeout 10",
+                "    ServerAliveInterval 5",
+                "    ServerAliveCountMax 2",
+                f"    Ciphers {_ssh_ciphers}",
+                "    Compression no",
+                "    IPQoS throughput",
+                "",
+                # Outside the block above, so they apply to every host; -F
+                # skips both files otherwise. Settings above take precedence.
+                "Host *",
+                "    Include ~/.ssh/config",
+                "    Include /etc/ssh/ssh_config",
+                "",
+            ]
+            config_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = config_path.with_name(f".ssh_config.{os.getpid()}")
+            tmp_path.write_text("\n".join(lines))
+            tmp_path.chmod(0o600)
+            os.replace(tmp_path, config_path)
+            _ssh_configs_written.add(key)
+
+    return str(config_path)
+
+
+def _ssh_control_master_running(username: str, hostname: str) -> bool:
+    """Check whether a ControlMaster is already serving our control socket."""
+    global _ssh_control_process
+    
+    # If we started it, check if it's still alive
+    if _ssh_control_process is not None:
+        if _ssh_control_process.poll() is None:
+            return True  # Still running
+        else:
+            _ssh_control_process = None  # Died, need to restart
+    
+    # A master may already be listening (e.g. spawned by ControlMaster=auto)
+    control_path = _get_control_path()
+    if Path(control_path).exists():
+        check = subprocess.run(
+            ["ssh", "-o", f"ControlPath={control_path}", "-O", "check", f"{username}@{hostname}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        return check.returncode == 0
+    return False
+
+
 def start_ssh_control_master(username: str, hostname: str, keyfile: str, gateway: Optional[str] = None) -> bool:
     """Start an SSH ControlMaster connection for connection reuse.
     
@@ -86,33 +317,22 @@ def start_ssh_control_master(username: str, hostname: str, keyfile: str, gateway
     """
     global _ssh_control_process
     
-    # If already running, check if it's still alive
-    if _ssh_control_process is not None:
-        if _ssh_control_process.poll() is None:
-            return True  # Still running
-        else:
-            _ssh_control_process = None  # Died, need to restart
+    if _ssh_control_master_running(username, hostname):
+        return True
     
     control_path = _get_control_path()
-    keyfile_expanded = str(Path(keyfile).expanduser())
     
     cmd = [
         "ssh",
-        "-i", keyfile_expanded,
+        "-F", _get_ssh_config(username, hostname, keyfile, gateway),
         "-o", "ConnectTimeout=15",
         "-o", "ControlMaster=yes",
         "-o", f"ControlPath={control_path}",
-        "-o", "ControlPersist=300",  # Keep connection alive for 5 minutes
-        "-o", "ServerAliveInterval=30",
-        "-o", "ServerAliveCountMax=3",
+        "-o", "ControlPersist=600",  # Keep connection alive for 10 minutes
         "-N",  # Don't execute remote command, just hold connection
+        _SSH_HOST_ALIAS,
     ]
     
-    if gateway:
-        cmd.extend(["-J", f"{username}@{gateway}"])
-    
-    cmd.append(f"{username}@{hostname}")
-    
     try:
         logger.debug(f"Starting SSH ControlMaster: {' '.join(cmd)}")
         _ssh_control_process = subprocess.Popen(
@@ -120,10 +340,16 @@ def start_ssh_control_master(username: str, hostname: str, keyfile: str, gateway
             stdout=subprocess.DEVNULL,
             stderr=subprocess.PIPE,
         )
-        # Give it a moment to establish
-        time.sleep(1)
+        # Wait until it is authenticated (its socket appears), which may
+        # include the user typing a key passphrase; the other commands run
+        # in batch mode and could not prompt in its place
+        deadline = time.monotonic() + 120
+        while not Path(control_path).exists() and time.monotonic() < deadline:
+            if _ssh_control_process.poll() is not None:
+                break
+            time.sleep(0.1)
         
-        # Check if it's still running (didn't fail immediately)
+        # Check if it's still running (didn't fail)
         if _ssh_control_process.poll() is not None:
             stderr = _ssh_control_process.stderr.read().decode() if _ssh_control_process.stderr else ""
             logger.warning(f"SSH ControlMaster failed to start: {stderr}")
@@ -143,10 +369,68 @@ def stop_ssh_control_master():
     _cleanup_ssh_control()
 
 
+@contextlib.contextmanager
+def ssh_control_master(username: str, hostname: str, keyfile: str, gateway: Optional[str] = None):
+    """Context manager holding one multiplexed SSH connection open.
+    
+    Every ssh/scp/rsync call made inside the block reuses the master's
+    socket instead of doing its own handshake. The master is torn down on
+    exit only if this block opened it, so nesting inside a caller that
+    already holds a connection is harmless.
+    
+    Parameters
+    ----------
+    username : str
+        Username for HPC cluster
+    hostname : str
+        Hostname for HPC cluster
+    keyfile : str
+        Path to SSH private key file
+    gateway : Optional[str]
+        ProxyJump gateway hostname
+    """
+    opened = not _ssh_control_master_running(username, hostname)
+    if opened and not start_ssh_control_master(username, hostname, keyfile, gateway):
+        logger.warning("Could not establish SSH ControlMaster, will use individual connections")
+        opened = False
+    try:
+        yield
+    finally:
+        if opened:
+            stop_ssh_control_master()
+
+
+@functools.lru_cache(maxsize=32)
+def _multiplexed_command(program: str, username: str, hostname: str, keyfile: str,
+                         gateway: Optional[str], ciphers: str) -> Tuple[str, ...]:
+    """Build the ssh/scp command prefix shared by every remote call.
+    
+    Memoized: the SSH config is written (and the keyfile expanded) once per
+    set of settings instead of on each of the many calls per submission.
+    ``ciphers`` is not used directly; it is part of the cache key so a
+    --hpc-cipher change still rewrites the config.
+
+    BatchMode makes a missing agent or wrong key fail at once instead of
+    waiting at a password prompt; only the ControlMaster (see
+    :func:`start_ssh_control_master`) may prompt for a key passphrase.
+    """
+    return (
+        program,
+        "-F", _get_ssh_config(username, hostname, keyfile, gateway),
+        "-o", "BatchMode=yes",
+        "-o", "ConnectTimeout=5",
+        "-o", "ControlMaster=auto",
+        "-o", f"ControlPath={_get_control_path()}",
+        "-o", "ControlPersist=600",
+    )
+
+
 def get_ssh_command(username: str, hostname: str, keyfile: str, gateway: Optional[str] = None) -> list:
     """Get SSH command with proper key configuration and optional ProxyJump.
     
-    If an SSH ControlMaster is active, the command will reuse that connection.
+    Connection multiplexing is always enabled: the command reuses the
+    ControlMaster socket if one is up, and otherwise becomes the master and
+    keeps it alive for later calls.
     
     Parameters
     ----------
@@ -164,26 +448,8 @@ def get_ssh_command(username: str, hostname: str, keyfile: str, gateway: Optiona
     list
         SSH command with options
     """
-    control_path = _get_control_path()
-    
-    cmd = [
-        "ssh",
-        "-i", str(Path(keyfile).expanduser()),
-        "-o", "ConnectTimeout=10",
-    ]
-    
-    # If ControlMaster socket exists, use it
-    if Path(control_path).exists():
-        cmd.extend([
-            "-o", f"ControlPath={control_path}",
-        ])
-    
-    if gateway:
-        cmd.extend(["-J", f"{username}@{gateway}"])
-    
-    cmd.append(f"{username}@{hostname}")
-    
-    return cmd
+    return [*_multiplexed_command("ssh", username, hostname, keyfile, gateway, _ssh_ciphers),
+            _SSH_HOST_ALIAS]
 
 
 def resolve_hpc_env_var(
@@ -216,19 +482,13 @@ def resolve_hpc_env_var(
     if not var_path or '$' not in var_path:
         return var_path
     
-    # Use login shell to resolve environment variables
-    ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
-        f"bash -l -c 'echo {var_path}'"
-    ]
-    
     try:
-        result = subprocess.run(ssh_cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode == 0 and result.stdout.strip():
-            # Take last line to skip shell init output
-            resolved = result.stdout.strip().split('\n')[-1]
-            if resolved and not resolved.startswith('$'):
-                logger.debug(f"Resolved '{var_path}' to '{resolved}'")
-                return resolved
+        resolved = _resolve_remote_env(username, hostname, keyfile, gateway, var_path)
+        if resolved and not resolved.startswith('$'):
+            cache = _resolve_remote_env.cache_info()
+            logger.debug(f"Resolved '{var_path}' to '{resolved}' "
+                         f"(cache hits={cache.hits}, misses={cache.misses})")
+            return resolved
     except Exception as e:
         logger.warning(f"Failed to resolve HPC path '{var_path}': {e}")
     
@@ -236,6 +496,98 @@ def resolve_hpc_env_var(
     return var_path
 
 
+def _quote_remote_path(path: str) -> str:
+    """Quote a path for a remote shell command.
+    
+    A leading ``~/`` is left unquoted so the remote shell still expands it.
+    Paths that still contain an unresolved variable (resolution failed) are
+    double-quoted so the remote shell can expand them; everything else is
+    single-quoted.
+    """
+    if path.startswith('~/'):
+        return '~/' + _quote_remote_path(path[2:])
+    if '$' in path:
+        return '"' + re.sub(r'(["\\`])', r'\\\1', path) + '"'
+    return shlex.quote(path)
+
+
+@functools.lru_cache(maxsize=64)
+def _resolve_remote_env(
+    username: str,
+    hostname: str,
+    keyfile: str,
+    gateway: Optional[str],
+    expr: str
+) -> str:
+    """Resolve a shell expression (e.g. '$GLOBALSCRATCH/rawdata') on the HPC.
+    
+    The login environment does not change during a run, so results are
+    memoized per (username, hostname, keyfile, gateway, expr). Only the
+    variables are looked up remotely (see :func:`_remote_env_var`) and the
+    expression is expanded here, so '$GLOBALSCRATCH/rawdata' and
+    '$GLOBALSCRATCH/derivatives' cost a single round-trip between them.
+    Failures raise instead of returning a fallback so that they are not
+    cached.
+    
+    Parameters
+    ----------
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH keyfile path
+    gateway : Optional[str]
+        ProxyJump gateway
+    expr : str
+        Expression to expand with the HPC login environment
+    
+    Returns
+    -------
+    str
+        Resolved value
+    
+    Raises
+    ------
+    RuntimeError
+        If a variable cannot be resolved
+    """
+    def lookup(match: re.Match) -> str:
+        # Worker threads checking data concurrently wait here for the first
+        # lookup instead of each opening a login shell
+        with _remote_env_lock:
+            return _remote_env_var(username, hostname, keyfile, gateway,
+                                   match.group(1) or match.group(2))
+    
+    return _ENV_VAR_PATTERN.sub(lookup, expr)
+
+
+@functools.lru_cache(maxsize=32)
+def _remote_env_var(
+    username: str,
+    hostname: str,
+    keyfile: str,
+    gateway: Optional[str],
+    name: str
+) -> str:
+    """Read one environment variable from an HPC login shell (memoized).
+    
+    Raises
+    ------
+    RuntimeError
+        If the remote command fails or the variable is empty
+    """
+    # Use login shell (-l) to ensure environment variables like $GLOBALSCRATCH are set
+    cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+        f"bash -l -c 'echo \"${{{name}}}\"'"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    if result.returncode != 0 or not result.stdout.strip():
+        raise RuntimeError(f"could not resolve '${name}' on {hostname}: {result.stderr.strip()}")
+    # Take last line to skip shell init output
+    return result.stdout.strip().split('\n')[-1]
+
+
 def check_apptainer_image_exists_on_hpc(
     username: str,
     hostname: str,
@@ -249,22 +601,8 @@ def check_apptainer_image_exists_on_hpc(
 
     This performs a remote `test -e` via SSH. Returns True if the file exists.
     """
-    # Map tool -> docker owner (should mirror ensure_image_exists() mapping)
-    if tool == "freesurfer":
-        tool_owner = "freesurfer"
-    elif tool == "fastsurfer":
-        tool_owner = "deepmi"
-    elif tool == "fmriprep":
-        tool_owner = "nipreps"
-    elif tool == "qsiprep":
-        tool_owner = "pennlinc"
-    elif tool == "qsirecon":
-        tool_owner = "pennlinc"
-    elif tool == "meld_graph":
-        tool_owner = "meldproject"
-    elif tool == "cvrmap":
-        tool_owner = "ln2t"
-    else:
+    tool_owner = TOOL_DOCKER_OWNERS.get(tool)
+    if tool_owner is None:
         logger.error(f"Unknown tool when checking HPC image: {tool}")
         return False
 
@@ -272,12 +610,17 @@ def check_apptainer_image_exists_on_hpc(
     image_name = f"{tool_owner}.{tool}.{version}.sif"
     remote_path = f"{hpc_apptainer_dir}/{image_name}"
 
-    # Use login shell to expand environment variables like $GLOBALSCRATCH
-    ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [f"bash -l -c 'test -e {remote_path}'"]
-
     try:
+        # Only the $GLOBALSCRATCH-style expansion needs a login shell; it is
+        # cached, so the existence test itself runs as a plain command
+        remote_path = f"{resolve_hpc_env_var(hpc_apptainer_dir, username, hostname, keyfile, gateway)}/{image_name}"
+        ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+            f"test -e {_quote_remote_path(remote_path)}"
+        ]
         logger.info(f"Checking for Apptainer image on HPC: {username}@{hostname}:{remote_path}")
-        result = subprocess.run(ssh_cmd, capture_output=True)
+        result = subprocess.run(
+            ssh_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=15
+        )
         return result.returncode == 0
     except Exception as e:
         logger.error(f"Error checking Apptainer image on HPC: {e}")
@@ -297,30 +640,22 @@ def get_hpc_image_build_command(
     
     Returns a ready-to-copy-paste command string.
     """
-    # Map tool -> docker owner
-    tool_owners = {
-        "freesurfer": "freesurfer",
-        "fastsurfer": "deepmi",
-        "fmriprep": "nipreps",
-        "qsiprep": "pennlinc",
-        "qsirecon": "pennlinc",
-        "meld_graph": "meldproject",
-        "cvrmap": "ln2t",
-    }
-    tool_owner = tool_owners.get(tool, tool)
+    tool_owner = get_tool_owner(tool)
     
     image_name = f"{tool_owner}.{tool}.{version}.sif"
     remote_path = f"{hpc_apptainer_dir}/{image_name}"
     docker_uri = f"docker://{tool_owner}/{tool}:{version}"
     
     # Build the SSH command
-    ssh_opts = f"-i {keyfile}"
+    ssh_opts = f"-i {shlex.quote(str(Path(keyfile).expanduser()))}"
     if gateway:
-        ssh_opts += f" -J {username}@{gateway}"
+        ssh_opts += f" -J {shlex.quote(f'{username}@{gateway}')}"
     
-    build_cmd = f"apptainer build {remote_path} {docker_uri}"
+    # Quoted once for the remote shell (which still expands $GLOBALSCRATCH
+    # and the like) and once more for the local one
+    build_cmd = f"apptainer build {_quote_remote_path(remote_path)} {shlex.quote(docker_uri)}"
     
-    return f"ssh {ssh_opts} {username}@{hostname} '{build_cmd}'"
+    return f"ssh {ssh_opts} {shlex.quote(f'{username}@{hostname}')} {shlex.quote(build_cmd)}"
 
 
 def get_tool_owner(tool: str) -> str:
@@ -336,23 +671,15 @@ def get_tool_owner(tool: str) -> str:
     str
         Docker Hub owner/organization
     """
-    tool_owners = {
-        "freesurfer": "freesurfer",
-        "fastsurfer": "deepmi",
-        "fmriprep": "nipreps",
-        "qsiprep": "pennlinc",
-        "qsirecon": "pennlinc",
-        "meld_graph": "meldproject",
-        "cvrmap": "ln2t",
-    }
-    return tool_owners.get(tool, tool)
+    return TOOL_DOCKER_OWNERS.get(tool, tool)
 
 
 def generate_apptainer_build_script(
     tool: str,
     version: str,
     hpc_apptainer_dir: str,
-    dataset: str
+    dataset: str,
+    apptainer_cachedir: Optional[str] = None
 ) -> str:
     """Generate SLURM script for building an Apptainer image on HPC.
     
@@ -366,6 +693,9 @@ def generate_apptainer_build_script(
         Path to apptainer images directory on HPC
     dataset : str
         Dataset name (for job naming and output paths)
+    apptainer_cachedir : Optional[str]
+        Shared Apptainer layer cache on HPC
+        (default: $GLOBALSCRATCH/apptainer_cache)
         
     Returns
     -------
@@ -379,70 +709,98 @@ def generate_apptainer_build_script(
     
     job_name = f"apptainer_build_{tool}_{version}".replace(".", "_")
     
-    script = f"""#!/bin/bash
-#SBATCH --job-name={job_name}
-#SBATCH --cpus-per-task=4
-#SBATCH --time=4:00:00
-#SBATCH --mem=32G
-#SBATCH --output={job_name}_%j.out
-#SBATCH --error={job_name}_%j.err
-
-# Apptainer Build Job
-# ===================
-# Tool: {tool}
-# Version: {version}
-# Docker URI: {docker_uri}
-# Output: {remote_path}
-
-echo "Job started at: $(date)"
-echo "Running on node: $(hostname)"
-echo "Job ID: $SLURM_JOB_ID"
-
-# Create output directory if needed
-mkdir -p {hpc_apptainer_dir}
+    return _APPTAINER_BUILD_TEMPLATE.format_map({
+        "job_name": job_name,
+        "log_name": f"build_{tool}_{version}.log",
+        "tool": tool,
+        "version": version,
+        "docker_uri": docker_uri,
+        "remote_path": remote_path,
+        "hpc_apptainer_dir": hpc_apptainer_dir,
+        "apptainer_cachedir": apptainer_cachedir or "$GLOBALSCRATCH/apptainer_cache",
+        "extra_directives": "",
+        "task_setup": "",
+    })
+
+
+def generate_apptainer_build_array_script(
+    images: List[Tuple[str, str]],
+    hpc_apptainer_dir: str,
+    concurrency: int = 4,
+    apptainer_cachedir: Optional[str] = None
+) -> str:
+    """Generate one SLURM array script that builds several Apptainer images.
+    
+    Each array task picks its (tool, version) from a manifest embedded in
+    the script, so N images cost a single sbatch call and the scheduler
+    can plan them as one unit.
+    
+    Parameters
+    ----------
+    images : List[Tuple[str, str]]
+        (tool, version) pairs to build
+    hpc_apptainer_dir : str
+        Path to apptainer images directory on HPC
+    concurrency : int
+        Maximum number of builds running at the same time (default: 4)
+    apptainer_cachedir : Optional[str]
+        Shared Apptainer layer cache on HPC
+        (default: $GLOBALSCRATCH/apptainer_cache)
+        
+    Returns
+    -------
+    str
+        SLURM batch script content
+    """
+    manifest = "\n".join(
+        f"{tool} {version} docker://{get_tool_owner(tool)}/{tool}:{version} "
+        f"{get_tool_owner(tool)}.{tool}.{version}.sif"
+        for tool, version in images
+    )
+    task_setup = f"""# Select this task's image from the manifest (tool, version, source, image name)
+read -r TOOL VERSION DOCKER_URI IMAGE_NAME < <(sed -n "$((SLURM_ARRAY_TASK_ID + 1))p" <<'MANIFEST'
+{manifest}
+MANIFEST
+)
+IMAGE_PATH="{hpc_apptainer_dir}/$IMAGE_NAME"
 
-# Set temporary directory for build (use local scratch if available)
-if [ -d "$LOCALSCRATCH" ]; then
-    export APPTAINER_TMPDIR="$LOCALSCRATCH"
-    echo "Using LOCALSCRATCH for temp: $APPTAINER_TMPDIR"
-elif [ -d "/tmp" ]; then
-    export APPTAINER_TMPDIR="/tmp/$USER/apptainer_build_$$"
-    mkdir -p "$APPTAINER_TMPDIR"
-    echo "Using /tmp for temp: $APPTAINER_TMPDIR"
-fi
-
-# Build the image
-echo ""
-echo "Building Apptainer image..."
-echo "  Source: {docker_uri}"
-echo "  Target: {remote_path}"
-echo ""
-
-apptainer build {remote_path} {docker_uri}
-
-BUILD_STATUS=$?
-
-# Cleanup temp directory
-if [ -n "$APPTAINER_TMPDIR" ] && [ -d "$APPTAINER_TMPDIR" ]; then
-    rm -rf "$APPTAINER_TMPDIR"
-fi
-
-if [ $BUILD_STATUS -eq 0 ]; then
-    echo ""
-    echo "✓ Build completed successfully!"
-    echo "  Image saved to: {remote_path}"
-    ls -lh {remote_path}
-else
-    echo ""
-    echo "✗ Build failed with exit code: $BUILD_STATUS"
-fi
-
-echo ""
-echo "Job finished at: $(date)"
-
-exit $BUILD_STATUS
 """
-    return script
+    return _APPTAINER_BUILD_TEMPLATE.format_map({
+        "job_name": "apptainer_build_array",
+        "log_name": "build_${TOOL}_${VERSION}.log",
+        "tool": "$TOOL",
+        "version": "$VERSION",
+        "docker_uri": "$DOCKER_URI",
+        "remote_path": "$IMAGE_PATH",
+        "hpc_apptainer_dir": hpc_apptainer_dir,
+        "apptainer_cachedir": apptainer_cachedir or "$GLOBALSCRATCH/apptainer_cache",
+        "extra_directives": f"#SBATCH --array=0-{len(images) - 1}%{concurrency}\n",
+        "task_setup": task_setup,
+    })
+
+
+@functools.lru_cache(maxsize=1)
+def _list_local_images(apptainer_dir: str) -> frozenset:
+    """List image file names in the local Apptainer directory.
+    
+    Reads the directory once per process instead of stat-ing one candidate
+    image per (tool, version) lookup.
+    
+    Parameters
+    ----------
+    apptainer_dir : str
+        Local Apptainer images directory
+        
+    Returns
+    -------
+    frozenset
+        Names of the files in the directory (empty if it does not exist)
+    """
+    try:
+        with os.scandir(apptainer_dir) as entries:
+            return frozenset(entry.name for entry in entries if entry.is_file())
+    except OSError:
+        return frozenset()
 
 
 def prompt_apptainer_build(
@@ -485,7 +843,7 @@ def prompt_apptainer_build(
     
     local_apptainer_dir = Path(getattr(args, 'apptainer_dir', '/opt/apptainer'))
     local_image_path = local_apptainer_dir / image_name
-    local_image_exists = local_image_path.exists()
+    local_image_exists = image_name in _list_local_images(str(local_apptainer_dir))
     
     logger = logging.getLogger(__name__)
     
@@ -526,30 +884,24 @@ def prompt_apptainer_build(
         print_info("This may take a while depending on the image size and network speed...", logger)
         
         try:
-            # Create remote directory if it doesn't exist (use login shell for env var expansion)
-            ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [f"bash -l -c 'mkdir -p {hpc_apptainer_dir}'"]
-            subprocess.run(ssh_cmd, check=True, capture_output=True)
+            # Resolve $GLOBALSCRATCH once (cached), then use literal paths
+            resolved_dir = resolve_hpc_env_var(hpc_apptainer_dir, username, hostname, keyfile, gateway)
+            remote_path = f"{resolved_dir}/{image_name}"
             
-            # Resolve remote path for scp (need to expand $GLOBALSCRATCH)
-            if hpc_apptainer_dir.startswith('$'):
-                resolve_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [f"bash -l -c 'echo {remote_path}'"]
-                result = subprocess.run(resolve_cmd, capture_output=True, text=True, timeout=30)
-                if result.returncode == 0 and result.stdout.strip():
-                    remote_path = result.stdout.strip().split('\n')[-1]
-            
-            # Push the image using scp
-            scp_cmd = get_scp_command(username, hostname, keyfile, gateway) + [
-                str(local_image_path), f"{username}@{hostname}:{remote_path}"
-            ]
-            result = subprocess.run(scp_cmd, capture_output=False)
+            # Push the image (resumable rsync, scp fallback); this also
+            # creates the remote directory
+            returncode = push_file_to_hpc(
+                local_image_path, remote_path, username, hostname, keyfile, gateway,
+                bwlimit=getattr(args, 'hpc_bwlimit', None)
+            )
             
-            if result.returncode == 0:
+            if returncode == 0:
                 print_section_header("IMAGE PUSHED SUCCESSFULLY", logger, logging.INFO)
                 print_success(f"Image now available at: {remote_path}", logger)
                 print_info("You can now re-run your original command.", logger)
                 return True
             else:
-                print_error(f"Failed to push image (exit code {result.returncode})", logger)
+                print_error(f"Failed to push image (exit code {returncode})", logger)
                 print_info("Falling back to manual instructions...", logger)
                 response = '3'
                 
@@ -567,7 +919,8 @@ def prompt_apptainer_build(
         tool=tool,
         version=version,
         hpc_apptainer_dir=hpc_apptainer_dir,
-        dataset=dataset
+        dataset=dataset,
+        apptainer_cachedir=getattr(args, 'hpc_apptainer_cachedir', None)
     )
     
     # Prepare paths for saving
@@ -581,41 +934,18 @@ def prompt_apptainer_build(
         print_info(f"Submitting Apptainer build job...", logger)
         
         try:
-            # Create temporary script file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as f:
-                f.write(script_content)
-                temp_script = f.name
-            
-            # Create remote directory for job scripts
-            remote_dir = f"~/ln2t_hpc_jobs/apptainer_builds"
-            ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [f"mkdir -p {remote_dir}"]
-            subprocess.run(ssh_cmd, check=True, capture_output=True)
-            
-            # Copy script to HPC
-            remote_script = f"{remote_dir}/build_{tool}_{version.replace('.', '_')}.sh"
-            scp_cmd = get_scp_command(username, hostname, keyfile, gateway) + [
-                temp_script, f"{username}@{hostname}:{remote_script}"
-            ]
-            subprocess.run(scp_cmd, check=True, capture_output=True)
-            
-            # Submit job
-            ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
-                f"cd {remote_dir} && sbatch build_{tool}_{version.replace('.', '_')}.sh"
-            ]
-            result = subprocess.run(ssh_cmd, capture_output=True, text=True, check=True)
-            
-            # Parse job ID
-            job_id = None
-            for text in [result.stdout.strip(), result.stderr.strip()]:
-                match = re.search(r'Submitted batch job (\d+)', text)
-                if match:
-                    job_id = match.group(1)
-                    break
-            
-            # Save script locally for reference
+            # Save script locally; it is uploaded and submitted in one SSH call
             with open(local_script_path, 'w') as f:
                 f.write(script_content)
             
+            remote_dir = "~/ln2t_hpc_jobs/apptainer_builds"
+            remote_script = f"{remote_dir}/{local_script_path.name}"
+            job_ids = submit_with_rate_limit(
+                submit_batch_jobs, getattr(args, 'hpc_submit_sleep', 1.0),
+                [local_script_path], remote_dir, username, hostname, keyfile, gateway
+            )
+            job_id = job_ids[0]
+            
             # Display success message with formatted output
             print_section_header("APPTAINER BUILD JOB SUBMITTED", logger, logging.INFO)
             if job_id:
@@ -629,9 +959,6 @@ def prompt_apptainer_build(
             print_info(f"3. Once complete, re-run your original command", logger, indent=1)
             print_info("", logger)
             
-            # Cleanup
-            Path(temp_script).unlink(missing_ok=True)
-            
             return True
             
         except subprocess.CalledProcessError as e:
@@ -693,6 +1020,83 @@ def prompt_apptainer_build(
     return False
 
 
+def prompt_apptainer_build_many(
+    images: Dict[Tuple[str, str], str],
+    args: Any
+) -> bool:
+    """Prompt user to build several missing Apptainer images on HPC.
+    
+    A single missing image goes through :func:`prompt_apptainer_build`.
+    Several images are offered as one SLURM array job; if the user declines
+    or the submission fails, each image falls back to the single-image
+    prompt (push, build job or manual instructions).
+    
+    Parameters
+    ----------
+    images : Dict[Tuple[str, str], str]
+        Maps each missing (tool, version) to the dataset that needs it
+    args : Any
+        Arguments namespace
+        
+    Returns
+    -------
+    bool
+        True if build job(s) were submitted or images pushed, False otherwise
+    """
+    if len(images) == 1:
+        (tool, version), dataset = next(iter(images.items()))
+        return prompt_apptainer_build(tool=tool, version=version, dataset=dataset, args=args)
+    
+    username = args.hpc_username
+    hostname = args.hpc_hostname
+    keyfile = args.hpc_keyfile
+    gateway = getattr(args, 'hpc_gateway', None)
+    hpc_apptainer_dir = getattr(args, 'hpc_apptainer_dir', None) or "$GLOBALSCRATCH/apptainer"
+    concurrency = getattr(args, 'hpc_array_concurrency', 4)
+    
+    logger = logging.getLogger(__name__)
+    
+    print_section_header("MISSING APPTAINER IMAGES ON HPC", logger, logging.WARNING)
+    for tool, version in images:
+        print_info(f"{tool} {version}", logger, indent=1)
+    print_info("", logger)
+    response = input(
+        f"Submit one array job to build all {len(images)} images? [y/N]: "
+    ).strip().lower()
+    
+    if response == 'y':
+        dataset = next(iter(images.values()))
+        code_dir = Path.home() / "code" / f"{dataset}-code"
+        code_dir.mkdir(parents=True, exist_ok=True)
+        local_script_path = code_dir / "build_apptainer_array.sh"
+        with open(local_script_path, 'w') as f:
+            f.write(generate_apptainer_build_array_script(
+                list(images), hpc_apptainer_dir, concurrency,
+                getattr(args, 'hpc_apptainer_cachedir', None)
+            ))
+        
+        remote_dir = "~/ln2t_hpc_jobs/apptainer_builds"
+        try:
+            job_ids = submit_with_rate_limit(
+                submit_batch_jobs, getattr(args, 'hpc_submit_sleep', 1.0),
+                [local_script_path], remote_dir, username, hostname, keyfile, gateway
+            )
+            print_section_header("APPTAINER BUILD ARRAY JOB SUBMITTED", logger, logging.INFO)
+            print_info(f"Job ID: {job_ids[0]} ({len(images)} tasks, at most {concurrency} at a time)", logger)
+            print_info(f"Remote script: {remote_dir}/{local_script_path.name}", logger)
+            print_info(f"Local copy: {local_script_path}", logger)
+            print_info("Once complete, re-run your original command", logger)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to submit build array job: {e}")
+            print_info("Falling back to one prompt per image...", logger)
+    
+    submitted = False
+    for (tool, version), dataset in images.items():
+        submitted = prompt_apptainer_build(tool=tool, version=version, dataset=dataset, args=args) or submitted
+    return submitted
+
+
 def get_scp_command(username: str, hostname: str, keyfile: str, gateway: Optional[str] = None) -> list:
     """Get SCP command with proper key configuration and optional ProxyJump.
     
@@ -712,24 +1116,252 @@ def get_scp_command(username: str, hostname: str, keyfile: str, gateway: Optiona
     list
         SCP command with options
     """
-    cmd = [
-        "scp",
-        "-i", str(Path(keyfile).expanduser()),
+    return list(_multiplexed_command("scp", username, hostname, keyfile, gateway, _ssh_ciphers))
+
+
+def get_rsync_ssh_option(username: str, hostname: str, keyfile: str, gateway: Optional[str] = None) -> str:
+    """Get the remote shell string for rsync's ``-e`` option.
+    
+    Uses the same SSH options as get_ssh_command (key, ProxyJump and
+    ControlMaster multiplexing) so rsync reuses the shared connection.
+    
+    Parameters
+    ----------
+    username : str
+        Username for HPC cluster
+    hostname : str
+        Hostname for HPC cluster
+    keyfile : str
+        Path to SSH private key file
+    gateway : Optional[str]
+        ProxyJump gateway hostname (e.g., 'gwceci.ulb.ac.be')
+        
+    Returns
+    -------
+    str
+        Shell-quoted SSH command without the destination
+    """
+    ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway)[:-1]
+    return " ".join(shlex.quote(part) for part in ssh_cmd)
+
+
+def push_file_to_hpc(
+    local_path: Path,
+    remote_path: str,
+    username: str,
+    hostname: str,
+    keyfile: str,
+    gateway: Optional[str] = None,
+    bwlimit: Optional[int] = None
+) -> int:
+    """Push a large file (e.g. an Apptainer image) to the HPC.
+    
+    The file is sent to '<remote_path>.part' and moved into place once
+    complete, so an interrupted push never leaves a truncated image under
+    the final name. With rsync, ``--inplace`` keeps what an interrupted push
+    already sent in the .part file and the delta algorithm only sends the
+    rest on the next attempt. There is no ``-z``: SIF images are already
+    squashfs-compressed. Falls back to scp (no resume) when rsync is not
+    available locally or on the cluster. The destination directory is
+    created as part of the rsync probe.
+    
+    Parameters
+    ----------
+    local_path : Path
+        File to push
+    remote_path : str
+        Destination path on the cluster (already expanded)
+    username : str
+        Username for HPC cluster
+    hostname : str
+        Hostname for HPC cluster
+    keyfile : str
+        Path to SSH private key file
+    gateway : Optional[str]
+        ProxyJump gateway hostname
+    bwlimit : Optional[int]
+        Bandwidth limit in KiB/s (None for unlimited)
+        
+    Returns
+    -------
+    int
+        Exit code of the transfer command
+    """
+    # Create the destination directory and look for rsync in the same call
+    remote_dir = _quote_remote_path(str(Path(remote_path).parent))
+    setup_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+        f"mkdir -p {remote_dir} && command -v rsync"
+    ]
+    try:
+        result = subprocess.run(setup_cmd, capture_output=True, text=True, timeout=30)
+        use_rsync = result.returncode == 0 and shutil.which("rsync") is not None
+    except subprocess.TimeoutExpired:
+        use_rsync = False
+    
+    partial_path = f"{remote_path}.part"
+    destination = f"{username}@{hostname}:{partial_path}"
+    if use_rsync:
+        cmd = [
+            "rsync", "-av", "--inplace",
+            "-e", get_rsync_ssh_option(username, hostname, keyfile, gateway),
+        ]
+        if bwlimit:
+            cmd.append(f"--bwlimit={bwlimit}")
+    else:
+        logger.info("rsync not available on both ends, falling back to scp")
+        cmd = get_scp_command(username, hostname, keyfile, gateway)
+        if bwlimit:
+            # scp expects Kbit/s
+            cmd.extend(["-l", str(bwlimit * 8)])
+    cmd.extend([str(local_path), destination])
+    
+    returncode = subprocess.run(cmd, capture_output=False).returncode
+    if returncode != 0:
+        return returncode
+    
+    # Complete: publish under the final name
+    mv_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+        f"mv -f {_quote_remote_path(partial_path)} {_quote_remote_path(remote_path)}"
     ]
+    return subprocess.run(mv_cmd).returncode
+
+
+def submit_with_rate_limit(fn: Callable[..., Any], min_interval_s: float, *args, **kwargs) -> Any:
+    """Call a job submission function, spacing calls at least min_interval_s apart.
     
-    if gateway:
-        cmd.extend(["-o", f"ProxyJump={username}@{gateway}"])
+    Submitting hundreds of jobs back-to-back can make the SLURM controller
+    throttle or reject requests. This keeps a module-wide timestamp of the
+    last submission and sleeps just long enough before the next one.
+    
+    Parameters
+    ----------
+    fn : Callable[..., Any]
+        Submission function (one job or one batch of jobs)
+    min_interval_s : float
+        Minimum delay in seconds between the start of two submissions
+    *args, **kwargs
+        Passed through to fn
+        
+    Returns
+    -------
+    Any
+        Return value of fn
+    """
+    global _last_submit_ts
+    with _submit_lock:
+        wait = _last_submit_ts + min_interval_s - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_submit_ts = time.monotonic()
+    return fn(*args, **kwargs)
+
+
+def _parse_sbatch_parsable(output: str) -> List[str]:
+    """Extract job IDs from ``sbatch --parsable`` output.
+    
+    Each submission prints one ``<jobid>[;<cluster>]`` line; anything that
+    is not a job ID (e.g. a stray warning) is skipped.
+    """
+    job_ids = []
+    for line in output.splitlines():
+        job_id = line.split(';', 1)[0].strip()
+        if job_id.isdigit():
+            job_ids.append(job_id)
+    return job_ids
+
+
+def submit_batch_jobs(
+    scripts: List[Path],
+    remote_dir: str,
+    username: str,
+    hostname: str,
+    keyfile: str,
+    gateway: Optional[str] = None
+) -> List[str]:
+    """Upload several job scripts and submit them with a single SSH call.
+    
+    The scripts are streamed as one tar archive into ``remote_dir`` and the
+    same remote shell then runs ``sbatch`` on each of them, so N submissions
+    cost one round-trip instead of 3N.
+    
+    Parameters
+    ----------
+    scripts : List[Path]
+        Local job scripts; they keep their file names on the HPC
+    remote_dir : str
+        Remote directory for the scripts (may start with ~)
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH keyfile path
+    gateway : Optional[str]
+        ProxyJump gateway
+        
+    Returns
+    -------
+    List[str]
+        Job IDs parsed from the sbatch output, in submission order
+        
+    Raises
+    ------
+    subprocess.CalledProcessError
+        If the upload fails or no job could be submitted
+    """
+    if not scripts:
+        return []
+    
+    tar_cmd = ["tar", "-cf", "-"]
+    for script in scripts:
+        tar_cmd.extend(["-C", str(Path(script).parent), Path(script).name])
+    
+    names = " ".join(shlex.quote(Path(script).name) for script in scripts)
+    remote_dir = _quote_remote_path(remote_dir)
+    remote_cmd = (
+        f"mkdir -p {remote_dir} && tar -C {remote_dir} -xf - && cd {remote_dir} && "
+        f"for script in {names}; do sbatch --parsable \"$script\"; done"
+    )
+    ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [remote_cmd]
+    
+    tar_proc = subprocess.Popen(tar_cmd, stdout=subprocess.PIPE)
+    try:
+        result = subprocess.run(ssh_cmd, stdin=tar_proc.stdout, capture_output=True, text=True)
+    finally:
+        tar_proc.stdout.close()
+        tar_proc.wait()
+    
+    logger.debug(f"sbatch stdout: {result.stdout!r}")
+    logger.debug(f"sbatch stderr: {result.stderr!r}")
+    
+    job_ids = _parse_sbatch_parsable(result.stdout)
+    if tar_proc.returncode != 0 or not job_ids:
+        raise subprocess.CalledProcessError(
+            result.returncode or tar_proc.returncode, ssh_cmd, result.stdout, result.stderr
+        )
+    if len(job_ids) < len(scripts):
+        logger.warning(f"Only {len(job_ids)} of {len(scripts)} jobs were submitted: {result.stderr.strip()}")
     
-    return cmd
+    return job_ids
 
 
 def validate_hpc_config(args) -> None:
-    """Validate HPC configuration arguments and set defaults."""
-    if args.hpc:
+    """Validate HPC configuration arguments and set defaults.
+
+    The result is recorded on ``args``, so the submission functions that
+    call this again for every participant return immediately.
+    """
+    global _ssh_ciphers
+    if args.hpc and not getattr(args, '_hpc_config_validated', False):
         # Set default for hpc_apptainer_dir if not provided
         if not getattr(args, 'hpc_apptainer_dir', None):
             args.hpc_apptainer_dir = "$GLOBALSCRATCH/apptainer"
         
+        _ssh_ciphers = getattr(args, 'hpc_cipher', None) or _DEFAULT_SSH_CIPHERS
+        
+        # Fail early on malformed --hpc-sbatch-option values
+        _parse_sbatch_options(getattr(args, 'hpc_sbatch_options', None))
+        
         required_args = {
             '--hpc-username': args.hpc_username,
             '--hpc-hostname': args.hpc_hostname,
@@ -745,11 +1377,17 @@ def validate_hpc_config(args) -> None:
                 f"Note: --hpc-apptainer-dir, --hpc-rawdata, and --hpc-derivatives are optional "
                 f"(defaults: $GLOBALSCRATCH/apptainer, $GLOBALSCRATCH/rawdata, $GLOBALSCRATCH/derivatives on cluster)"
             )
+        
+        args._hpc_config_validated = True
 
 
 def test_ssh_connection(username: str, hostname: str, keyfile: str, gateway: Optional[str] = None) -> bool:
     """Test SSH connection to HPC and establish ControlMaster for connection reuse.
     
+    A live ControlMaster has already authenticated, so when one is serving
+    the control socket the connection is reported as working without a
+    remote round trip (``ssh -O check`` only queries the local socket).
+    
     Parameters
     ----------
     username : str
@@ -766,6 +1404,9 @@ def test_ssh_connection(username: str, hostname: str, keyfile: str, gateway: Opt
     bool
         True if connection successful, False otherwise
     """
+    if _ssh_control_master_running(username, hostname):
+        return True
+    
     # First, start the ControlMaster for connection reuse
     if not start_ssh_control_master(username, hostname, keyfile, gateway):
         logger.warning("Could not establish SSH ControlMaster, will use individual connections")
@@ -776,7 +1417,7 @@ def test_ssh_connection(username: str, hostname: str, keyfile: str, gateway: Opt
             cmd,
             capture_output=True,
             text=True,
-            timeout=15
+            timeout=10
         )
         if result.returncode == 0 and "connected" in result.stdout:
             logger.info(f"✓ SSH connection to {username}@{hostname} successful")
@@ -815,9 +1456,11 @@ def check_remote_path_exists(username: str, hostname: str, keyfile: str, gateway
         True if path exists, False otherwise
     """
     try:
-        # Quote the remote_path to avoid remote shell word-splitting/expansion issues
-        remote_test = f"test -e '{remote_path}' && echo 'exists' || echo 'not_found'"
-        cmd = get_ssh_command(username, hostname, keyfile, gateway) + [remote_test]
+        # Plain command (no login shell); quote the path so the remote shell
+        # does not word-split or expand it
+        cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+            f"test -e {_quote_remote_path(remote_path)}"
+        ]
         result = subprocess.run(
             cmd,
             capture_output=True,
@@ -826,7 +1469,7 @@ def check_remote_path_exists(username: str, hostname: str, keyfile: str, gateway
         )
 
         # If the test failed, log the command and returned output to help debugging
-        if not (result.returncode == 0 and "exists" in result.stdout):
+        if result.returncode != 0:
             try:
                 logger.debug(f"SSH command for remote check: {' '.join(cmd)}")
             except Exception:
@@ -834,12 +1477,126 @@ def check_remote_path_exists(username: str, hostname: str, keyfile: str, gateway
             logger.debug(f"Remote check stdout: {result.stdout!r}")
             logger.debug(f"Remote check stderr: {result.stderr!r}")
 
-        return result.returncode == 0 and "exists" in result.stdout
+        return result.returncode == 0
     except Exception as e:
         logger.error(f"Error checking remote path {remote_path}: {e}")
         return False
 
 
+def _run_streamed(cmd: list, consume: Callable[[str], None],
+                  timeout: float) -> subprocess.CompletedProcess:
+    """Run a command, handing each stdout line to consume as it arrives.
+
+    Used instead of ``subprocess.run(capture_output=True)`` for remote
+    listings that can run to tens of thousands of lines, so the output is
+    never held in memory as one string.
+
+    Parameters
+    ----------
+    cmd : list
+        Command to run (usually an SSH command)
+    consume : Callable[[str], None]
+        Called with every stdout line, without its trailing newline
+    timeout : float
+        Seconds after which the command is killed
+
+    Returns
+    -------
+    subprocess.CompletedProcess
+        Return code and stderr of the command (stdout is None)
+
+    Raises
+    ------
+    subprocess.TimeoutExpired
+        If the command did not finish within timeout
+    """
+    timed_out = threading.Event()
+    with tempfile.TemporaryFile(mode='w+') as err, \
+            subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, text=True) as proc:
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        try:
+            for line in proc.stdout:
+                consume(line.rstrip('\n'))
+            proc.wait()
+        finally:
+            timer.cancel()
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        err.seek(0)
+        return subprocess.CompletedProcess(cmd, proc.returncode, None, err.read())
+
+
+def list_remote_subjects(remote_base: str, username: str, hostname: str, keyfile: str,
+                         gateway: Optional[str] = None) -> set:
+    """List the entries directly under a directory on the remote HPC cluster.
+    
+    One listing answers the existence question for every participant in a
+    derivative folder (e.g. all ``sub-*`` directories of a FreeSurfer run),
+    instead of one ``test -e`` round-trip per participant.
+    
+    Parameters
+    ----------
+    remote_base : str
+        Resolved directory path on the remote system
+    username : str
+        Username for HPC cluster
+    hostname : str
+        Hostname for HPC cluster
+    keyfile : str
+        Path to SSH private key file
+    gateway : Optional[str]
+        ProxyJump gateway hostname
+        
+    Returns
+    -------
+    set
+        Names of the entries under remote_base (empty if it does not exist)
+        
+    Raises
+    ------
+    RuntimeError
+        If the SSH connection itself fails
+    """
+    cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+        f"find {_quote_remote_path(remote_base)} -mindepth 1 -maxdepth 1 -printf '%f\\n' 2>/dev/null"
+    ]
+    entries = set()
+    result = _run_streamed(cmd, entries.add, timeout=60)
+    if result.returncode == 255:
+        raise RuntimeError(f"could not list '{remote_base}' on {hostname}: {result.stderr.strip()}")
+    # A missing directory makes find exit non-zero with no output
+    entries.discard('')
+    return entries
+
+
+@functools.lru_cache(maxsize=128)
+def _list_remote_dir_cached(username: str, hostname: str, keyfile: str, gateway: Optional[str],
+                            remote_base: str) -> frozenset:
+    """Memoized :func:`list_remote_subjects`; cleared after every upload."""
+    return frozenset(list_remote_subjects(remote_base, username, hostname, keyfile, gateway))
+
+
+def _remote_path_exists(username: str, hostname: str, keyfile: str, gateway: Optional[str],
+                        path: str) -> bool:
+    """Check a resolved remote path against the cached listing of its parent."""
+    parent, _, name = path.rstrip('/').rpartition('/')
+    with _listing_lock:
+        listing = _list_remote_dir_cached(username, hostname, keyfile, gateway, parent)
+    return name in listing
+
+
+def clear_remote_caches() -> None:
+    """Forget resolved HPC paths and remote directory listings."""
+    _resolve_remote_env.cache_clear()
+    _remote_env_var.cache_clear()
+    _list_remote_dir_cached.cache_clear()
+
+
 def prompt_upload_data(local_path: str, remote_path: str, username: str, hostname: str, 
                       keyfile: str, gateway: Optional[str], participant_label: str = "") -> bool:
     """Prompt user to upload data to HPC and perform upload if confirmed.
@@ -867,10 +1624,11 @@ def prompt_upload_data(local_path: str, remote_path: str, username: str, hostnam
         True if upload successful or user declined, False if upload failed
     """
     participant_info = f"[sub-{participant_label}] " if participant_label else ""
-    print(f"\n⚠️  {participant_info}Required data not found on HPC: {remote_path}")
-    print(f"   Local path: {local_path}")
-    
-    response = input("\nWould you like to upload the data to the HPC? [y/N]: ").strip().lower()
+    with _prompt_lock:
+        print(f"\n⚠️  {participant_info}Required data not found on HPC: {remote_path}")
+        print(f"   Local path: {local_path}")
+        
+        response = input("\nWould you like to upload the data to the HPC? [y/N]: ").strip().lower()
     
     if response != 'y':
         print("Upload declined. Job submission cancelled.")
@@ -879,25 +1637,31 @@ def prompt_upload_data(local_path: str, remote_path: str, username: str, hostnam
     print(f"\nUploading {local_path} to {username}@{hostname}:{remote_path}...")
     
     try:
-        # Create remote directory first
-        parent_dir = str(Path(remote_path).parent)
-        ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [f"mkdir -p {parent_dir}"]
-        subprocess.run(ssh_cmd, check=True, capture_output=True)
-        
-        # Upload data using rsync for better performance
-        if gateway:
-            proxy_cmd = f"ssh -i {keyfile} -J {username}@{gateway}"
-        else:
-            proxy_cmd = f"ssh -i {keyfile}"
-        
-        rsync_cmd = [
-            "rsync", "-avz", "--progress",
-            "-e", proxy_cmd,
+        # Upload data using rsync over the multiplexed SSH connection. An
+        # interrupted file is kept in a .rsync-partial directory next to its
+        # destination, never under its final name (where the existence check
+        # would accept it), and the next upload resumes from it.
+        # Progress output is only useful (and only cheap) on a terminal.
+        rsync_cmd = ["rsync", "-az", "--partial-dir=.rsync-partial"]
+        if sys.stdout.isatty():
+            rsync_cmd += ["--info=progress2", "--no-inc-recursive"]
+        # The remote receiver creates the parent directory itself, saving a
+        # separate SSH call
+        parent_dir = _quote_remote_path(str(Path(remote_path).parent))
+        rsync_cmd += [
+            "-e", get_rsync_ssh_option(username, hostname, keyfile, gateway),
+            f"--rsync-path=mkdir -p {parent_dir} && rsync",
             f"{local_path}/",
             f"{username}@{hostname}:{remote_path}/"
         ]
-        result = subprocess.run(rsync_cmd, check=True)
+        # Inherit stdout/stderr so rsync writes straight to the terminal
+        # instead of through Python-managed pipes
+        process = subprocess.Popen(rsync_cmd)
+        returncode = process.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, rsync_cmd)
         
+        _list_remote_dir_cached.cache_clear()
         print(f"✓ Successfully uploaded data to {remote_path}")
         return True
         
@@ -907,19 +1671,139 @@ def prompt_upload_data(local_path: str, remote_path: str, username: str, hostnam
         return False
 
 
-def check_required_data(tool: str, dataset: str, participant_label: str, args: Any,
-                       username: str, hostname: str, keyfile: str, gateway: Optional[str],
-                       hpc_rawdata: str, hpc_derivatives: str) -> bool:
-    """Check if required input data exists on HPC, prompt for upload if missing.
+def bulk_upload_subjects(local_base: Path, remote_base: str, subjects: List[str], username: str,
+                         hostname: str, keyfile: str, gateway: Optional[str] = None) -> bool:
+    """Upload selected subject directories as a single tar stream.
+    
+    Only the listed subjects are sent, in one archive piped through one SSH
+    session, instead of rsync walking the whole derivative tree.
     
     Parameters
     ----------
-    tool : str
-        Tool name
-    dataset : str
-        Dataset name
-    participant_label : str
-        Participant label
+    local_base : Path
+        Local derivative folder containing the subject directories
+    remote_base : str
+        Resolved destination folder on the HPC
+    subjects : List[str]
+        Subject directory names (e.g. 'sub-01') relative to local_base
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH keyfile
+    gateway : Optional[str]
+        ProxyJump gateway
+        
+    Returns
+    -------
+    bool
+        True if the upload succeeded, False otherwise
+    """
+    if not subjects:
+        return True
+    
+    print(f"\nUploading {len(subjects)} subject(s) from {local_base} to {username}@{hostname}:{remote_base}...")
+    
+    remote_dir = _quote_remote_path(remote_base)
+    tar_cmd = ["tar", "-C", str(local_base), "-cf", "-"] + list(subjects)
+    ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+        f"mkdir -p {remote_dir} && tar -C {remote_dir} -xf -"
+    ]
+    
+    tar_proc = subprocess.Popen(tar_cmd, stdout=subprocess.PIPE)
+    try:
+        result = subprocess.run(ssh_cmd, stdin=tar_proc.stdout, capture_output=True, text=True)
+    finally:
+        tar_proc.stdout.close()
+        tar_proc.wait()
+    
+    if tar_proc.returncode != 0 or result.returncode != 0:
+        logger.error(f"Failed to upload subjects to {remote_base}: {result.stderr.strip()}")
+        print(f"\n✗ Upload failed. Please upload manually or check permissions.")
+        return False
+    
+    _list_remote_dir_cached.cache_clear()
+    print(f"✓ Successfully uploaded {len(subjects)} subject(s) to {remote_base}")
+    return True
+
+
+def _upload_missing_subjects(entries: List[Dict[str, Any]], username: str, hostname: str,
+                             keyfile: str, gateway: Optional[str]) -> Dict[str, bool]:
+    """Offer to upload missing subject directories that share a destination.
+    
+    Parameters
+    ----------
+    entries : List[Dict[str, Any]]
+        Missing-data entries with a 'subject_dir' key and the same 'upload_path'
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH keyfile path
+    gateway : Optional[str]
+        ProxyJump gateway
+        
+    Returns
+    -------
+    Dict[str, bool]
+        Upload outcome per entry 'remote_path'
+    """
+    outcomes = {}
+    local_base = entries[0]['local_path']
+    remote_base = entries[0]['upload_path']
+    
+    available = []
+    for entry in entries:
+        if (local_base / entry['subject_dir']).exists():
+            available.append(entry)
+        else:
+            hints = entry['hints']
+            print(f"\n✗ [sub-{entry['participant_label']}] {hints[0]}")
+            for line in hints[1:]:
+                print(f"   {line}")
+            outcomes[entry['remote_path']] = False
+    
+    if not available:
+        return outcomes
+    
+    subjects = [entry['subject_dir'] for entry in available]
+    with _prompt_lock:
+        print(f"\n⚠️  {len(subjects)} subject(s) not found on HPC under: {remote_base}")
+        print(f"   {', '.join(subjects)}")
+        print(f"   Local path: {local_base}")
+        
+        response = input("\nWould you like to upload them to the HPC? [y/N]: ").strip().lower()
+    
+    if response != 'y':
+        print("Upload declined. Job submission cancelled.")
+        uploaded = False
+    else:
+        uploaded = bulk_upload_subjects(local_base, remote_base, subjects, username, hostname,
+                                        keyfile, gateway)
+    
+    for entry in available:
+        outcomes[entry['remote_path']] = uploaded
+    return outcomes
+
+
+def _find_missing_data(tool: str, dataset: str, participant_label: str, args: Any,
+                       username: str, hostname: str, keyfile: str, gateway: Optional[str],
+                       hpc_rawdata: str, hpc_derivatives: str) -> List[Dict[str, Any]]:
+    """Probe the HPC for the input data a tool requires, without prompting.
+    
+    This is safe to call from worker threads: it only logs, and leaves any
+    interactive upload prompt to :func:`_handle_missing_data`.
+    
+    Parameters
+    ----------
+    tool : str
+        Tool name
+    dataset : str
+        Dataset name
+    participant_label : str
+        Participant label
     args : Any
         Arguments namespace
     username : str
@@ -937,8 +1821,13 @@ def check_required_data(tool: str, dataset: str, participant_label: str, args: A
         
     Returns
     -------
-    bool
-        True if all required data present or uploaded, False otherwise
+    List[Dict[str, Any]]
+        One entry per missing input, with keys 'participant_label',
+        'remote_path' (path that was checked), 'upload_path' (upload
+        destination), 'local_path' (local source) and 'hints' (lines to
+        print when the data is not available locally either). Entries for a
+        single subject folder also carry 'subject_dir', relative to both
+        'local_path' and 'upload_path'
     """
     logger.info(f"Checking required data for participant sub-{participant_label}...")
     
@@ -953,37 +1842,44 @@ def check_required_data(tool: str, dataset: str, participant_label: str, args: A
     else:
         hpc_derivatives_check = hpc_derivatives
     
-    # For environment variable paths, we need to resolve them via SSH
-    # Use login shell (-l) to ensure environment variables like $GLOBALSCRATCH are set
+    # For environment variable paths, we need to resolve them via SSH.
+    # Resolution is memoized so only the first participant pays the round-trip.
     if hpc_rawdata_check.startswith('$'):
-        cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
-            f"bash -l -c 'echo {hpc_rawdata_check}'"
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode == 0 and result.stdout.strip():
-            hpc_rawdata_check = result.stdout.strip().split('\n')[-1]  # Take last line (skip any shell init output)
+        try:
+            hpc_rawdata_check = _resolve_remote_env(username, hostname, keyfile, gateway, hpc_rawdata_check)
+        except Exception as e:
+            logger.warning(f"Failed to resolve HPC path '{hpc_rawdata_check}': {e}")
     
     if hpc_derivatives_check.startswith('$'):
-        cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
-            f"bash -l -c 'echo {hpc_derivatives_check}'"
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode == 0 and result.stdout.strip():
-            hpc_derivatives_check = result.stdout.strip().split('\n')[-1]  # Take last line (skip any shell init output)
+        try:
+            hpc_derivatives_check = _resolve_remote_env(username, hostname, keyfile, gateway, hpc_derivatives_check)
+        except Exception as e:
+            logger.warning(f"Failed to resolve HPC path '{hpc_derivatives_check}': {e}")
+    
+    # Existence checks are answered from one cached listing per remote
+    # directory, shared by all participants of the run
+    def path_exists(path: str) -> bool:
+        return _remote_path_exists(username, hostname, keyfile, gateway, path)
+    
+    missing = []
+    local_derivatives = Path.home() / "derivatives" / f"{dataset}-derivatives"
     
     # Check rawdata
     rawdata_path = f"{hpc_rawdata_check}/{dataset}-rawdata"
     logger.info(f"  [sub-{participant_label}] Checking rawdata on HPC: {rawdata_path}")
-    if not check_remote_path_exists(username, hostname, keyfile, gateway, rawdata_path):
+    if not path_exists(rawdata_path):
         logger.warning(f"[sub-{participant_label}] Required data not found on HPC: {rawdata_path}")
         local_rawdata = Path.home() / "rawdata" / f"{dataset}-rawdata"
-        if local_rawdata.exists():
-            if not prompt_upload_data(str(local_rawdata), rawdata_path, username, hostname, keyfile, gateway, participant_label):
-                return False
-        else:
-            print(f"\n✗ [sub-{participant_label}] Rawdata not found locally at {local_rawdata}")
-            print(f"   Cannot proceed without rawdata on HPC")
-            return False
+        missing.append({
+            'participant_label': participant_label,
+            'remote_path': rawdata_path,
+            'upload_path': rawdata_path,
+            'local_path': local_rawdata,
+            'hints': [
+                f"Rawdata not found locally at {local_rawdata}",
+                "Cannot proceed without rawdata on HPC",
+            ],
+        })
     else:
         logger.info(f"  [sub-{participant_label}] ✓ Rawdata found on HPC")
     
@@ -1001,19 +1897,22 @@ def check_required_data(tool: str, dataset: str, participant_label: str, args: A
             
             logger.info(f"  [sub-{participant_label}] Checking FreeSurfer outputs on HPC (required by default): {fs_subject_path}")
             
-            if not check_remote_path_exists(username, hostname, keyfile, gateway, fs_subject_path):
+            if not path_exists(fs_subject_path):
                 logger.warning(f"[sub-{participant_label}] Required FreeSurfer outputs not found on HPC: {fs_subject_path}")
-                local_fs = Path.home() / "derivatives" / f"{dataset}-derivatives" / f"freesurfer_{fs_version}"
-                if local_fs.exists():
-                    if not prompt_upload_data(str(local_fs), fs_base_path, username, hostname, keyfile, gateway, participant_label):
-                        return False
-                else:
-                    print(f"\n✗ [sub-{participant_label}] FreeSurfer outputs not found on HPC: {fs_subject_path}")
-                    print(f"   fMRIPrep now requires pre-computed FreeSurfer outputs by default.")
-                    print(f"   Either:")
-                    print(f"     1. Run FreeSurfer first: ln2t_tools freesurfer --dataset {dataset} --participant-label {participant_label}")
-                    print(f"     2. Use --fmriprep-reconall to allow fMRIPrep to run FreeSurfer reconstruction")
-                    return False
+                missing.append({
+                    'participant_label': participant_label,
+                    'remote_path': fs_subject_path,
+                    'upload_path': fs_base_path,
+                    'local_path': local_derivatives / f"freesurfer_{fs_version}",
+                    'subject_dir': f"sub-{participant_label}",
+                    'hints': [
+                        f"FreeSurfer outputs not found on HPC: {fs_subject_path}",
+                        "fMRIPrep now requires pre-computed FreeSurfer outputs by default.",
+                        "Either:",
+                        f"  1. Run FreeSurfer first: ln2t_tools freesurfer --dataset {dataset} --participant-label {participant_label}",
+                        "  2. Use --fmriprep-reconall to allow fMRIPrep to run FreeSurfer reconstruction",
+                    ],
+                })
             else:
                 logger.info(f"  [sub-{participant_label}] ✓ FreeSurfer outputs found on HPC")
         else:
@@ -1027,38 +1926,44 @@ def check_required_data(tool: str, dataset: str, participant_label: str, args: A
         
         logger.info(f"  [sub-{participant_label}] Checking FreeSurfer outputs on HPC: {fs_subject_path}")
         
-        if not check_remote_path_exists(username, hostname, keyfile, gateway, fs_subject_path):
+        if not path_exists(fs_subject_path):
             logger.warning(f"[sub-{participant_label}] Required FreeSurfer outputs not found on HPC: {fs_subject_path}")
-            local_fs = Path.home() / "derivatives" / f"{dataset}-derivatives" / f"freesurfer_{fs_version}"
-            if local_fs.exists():
-                if not prompt_upload_data(str(local_fs), fs_base_path, username, hostname, keyfile, gateway, participant_label):
-                    return False
-            else:
-                print(f"\n✗ [sub-{participant_label}] FreeSurfer outputs not found locally at {local_fs}")
-                print(f"   Cannot use --use-precomputed-fs without FreeSurfer outputs on HPC")
-                return False
+            local_fs = local_derivatives / f"freesurfer_{fs_version}"
+            missing.append({
+                'participant_label': participant_label,
+                'remote_path': fs_subject_path,
+                'upload_path': fs_base_path,
+                'local_path': local_fs,
+                'subject_dir': f"sub-{participant_label}",
+                'hints': [
+                    f"FreeSurfer outputs not found locally at {local_fs}",
+                    "Cannot use --use-precomputed-fs without FreeSurfer outputs on HPC",
+                ],
+            })
         else:
             logger.info(f"  [sub-{participant_label}] ✓ FreeSurfer outputs found on HPC")
     
     # Check for QSIPrep outputs if running QSIRecon
     if tool == 'qsirecon':
-        from ln2t_tools.utils.defaults import DEFAULT_QSIPREP_VERSION
         # QSIRecon requires QSIPrep v1.1.1
         qsiprep_version = getattr(args, 'qsiprep_version', DEFAULT_QSIPREP_VERSION)
         qsiprep_path = f"{hpc_derivatives_check}/{dataset}-derivatives/qsiprep_{qsiprep_version}"
         
         logger.info(f"  [sub-{participant_label}] Checking QSIPrep outputs on HPC: {qsiprep_path}")
         
-        if not check_remote_path_exists(username, hostname, keyfile, gateway, qsiprep_path):
+        if not path_exists(qsiprep_path):
             logger.warning(f"[sub-{participant_label}] Required QSIPrep outputs not found on HPC: {qsiprep_path}")
-            local_qsiprep = Path.home() / "derivatives" / f"{dataset}-derivatives" / f"qsiprep_{qsiprep_version}"
-            if local_qsiprep.exists():
-                if not prompt_upload_data(str(local_qsiprep), qsiprep_path, username, hostname, keyfile, gateway, participant_label):
-                    return False
-            else:
-                print(f"\n✗ [sub-{participant_label}] QSIPrep outputs not found locally at {local_qsiprep}")
-                print(f"   Cannot run QSIRecon without QSIPrep outputs on HPC")
-                return False
+            local_qsiprep = local_derivatives / f"qsiprep_{qsiprep_version}"
+            missing.append({
+                'participant_label': participant_label,
+                'remote_path': qsiprep_path,
+                'upload_path': qsiprep_path,
+                'local_path': local_qsiprep,
+                'hints': [
+                    f"QSIPrep outputs not found locally at {local_qsiprep}",
+                    "Cannot run QSIRecon without QSIPrep outputs on HPC",
+                ],
+            })
         else:
             logger.info(f"  [sub-{participant_label}] ✓ QSIPrep outputs found on HPC")
     
@@ -1070,105 +1975,353 @@ def check_required_data(tool: str, dataset: str, participant_label: str, args: A
         
         logger.info(f"  [sub-{participant_label}] Checking fMRIPrep outputs on HPC: {fmriprep_path}")
         
-        if not check_remote_path_exists(username, hostname, keyfile, gateway, fmriprep_path):
+        if not path_exists(fmriprep_path):
             logger.warning(f"[sub-{participant_label}] Required fMRIPrep outputs not found on HPC: {fmriprep_path}")
-            local_fmriprep = Path.home() / "derivatives" / f"{dataset}-derivatives" / f"fmriprep_{fmriprep_version}"
-            if local_fmriprep.exists():
-                if not prompt_upload_data(str(local_fmriprep), fmriprep_path, username, hostname, keyfile, gateway, participant_label):
-                    return False
-            else:
-                print(f"\n✗ [sub-{participant_label}] fMRIPrep outputs not found locally at {local_fmriprep}")
-                print(f"   Cannot run CVRmap without fMRIPrep outputs on HPC")
-                return False
+            local_fmriprep = local_derivatives / f"fmriprep_{fmriprep_version}"
+            missing.append({
+                'participant_label': participant_label,
+                'remote_path': fmriprep_path,
+                'upload_path': fmriprep_path,
+                'local_path': local_fmriprep,
+                'hints': [
+                    f"fMRIPrep outputs not found locally at {local_fmriprep}",
+                    "Cannot run CVRmap without fMRIPrep outputs on HPC",
+                ],
+            })
         else:
             logger.info(f"  [sub-{participant_label}] ✓ fMRIPrep outputs found on HPC")
     
-    return True
+    return missing
 
 
-def generate_hpc_script(
-    tool: str,
-    participant_label: str,
-    dataset: str,
-    args: Any,
-    hpc_rawdata: str,
-    hpc_derivatives: str,
-    hpc_apptainer_dir: str
-) -> str:
-    """Generate HPC batch script for job submission.
+def _handle_missing_data(missing: List[Dict[str, Any]], username: str, hostname: str,
+                         keyfile: str, gateway: Optional[str]) -> bool:
+    """Offer to upload each missing input found by :func:`_find_missing_data`.
     
-    This function generates SLURM batch scripts with tool_args pass-through.
-    Tool-specific arguments should be provided via --tool-args on the CLI.
+    Parameters
+    ----------
+    missing : List[Dict[str, Any]]
+        Missing-data entries
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH keyfile path
+    gateway : Optional[str]
+        ProxyJump gateway
+        
+    Returns
+    -------
+    bool
+        True if every missing input was uploaded, False otherwise
+    """
+    for entry in missing:
+        participant_label = entry['participant_label']
+        local_path = entry['local_path']
+        if 'subject_dir' in entry:
+            if not _upload_missing_subjects([entry], username, hostname, keyfile,
+                                            gateway)[entry['remote_path']]:
+                return False
+        elif local_path.exists():
+            if not prompt_upload_data(str(local_path), entry['upload_path'], username, hostname,
+                                      keyfile, gateway, participant_label):
+                return False
+        else:
+            hints = entry['hints']
+            print(f"\n✗ [sub-{participant_label}] {hints[0]}")
+            for line in hints[1:]:
+                print(f"   {line}")
+            return False
+    return True
+
+
+def check_required_data(tool: str, dataset: str, participant_label: str, args: Any,
+                       username: str, hostname: str, keyfile: str, gateway: Optional[str],
+                       hpc_rawdata: str, hpc_derivatives: str) -> bool:
+    """Check if required input data exists on HPC, prompt for upload if missing.
     
     Parameters
     ----------
     tool : str
-        Tool name (e.g., 'meld_graph', 'freesurfer', 'fmriprep')
-    participant_label : str
-        Subject/participant label
+        Tool name
     dataset : str
         Dataset name
-    args : argparse.Namespace
-        Parsed command line arguments (includes tool_args)
+    participant_label : str
+        Participant label
+    args : Any
+        Arguments namespace
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH keyfile path
+    gateway : Optional[str]
+        ProxyJump gateway
     hpc_rawdata : str
-        Path to rawdata on HPC (can be None to use $GLOBALSCRATCH/rawdata)
+        HPC rawdata path
     hpc_derivatives : str
-        Path to derivatives on HPC (can be None to use $GLOBALSCRATCH/derivatives)
-    hpc_apptainer_dir : str
-        Path to apptainer images on HPC
+        HPC derivatives path
         
     Returns
     -------
-    str
-        HPC batch script content
+    bool
+        True if all required data present or uploaded, False otherwise
     """
-    # Get tool_args for pass-through
-    tool_args = getattr(args, 'tool_args', '') or ''
-    
-    # Determine job name
-    job_name = f"{tool}-{dataset}-{participant_label}"
-    
-    # Paths should be resolved by caller - these are fallbacks
-    if not hpc_rawdata:
-        logger.warning("hpc_rawdata not provided to generate_hpc_script - using $GLOBALSCRATCH fallback")
-        hpc_rawdata = "$GLOBALSCRATCH/rawdata"
-    if not hpc_derivatives:
-        logger.warning("hpc_derivatives not provided to generate_hpc_script - using $GLOBALSCRATCH fallback")
-        hpc_derivatives = "$GLOBALSCRATCH/derivatives"
-    
-    # Get partition and resource settings
-    partition = getattr(args, 'hpc_partition', None)
-    time_limit = getattr(args, 'hpc_time', '24:00:00')  # Default 24 hours for most tools
-    memory = getattr(args, 'hpc_mem', '32G')
-    cpus = getattr(args, 'hpc_cpus', 8)
-    gpus = getattr(args, 'hpc_gpus', 1)
+    missing = _find_missing_data(tool, dataset, participant_label, args, username, hostname,
+                                 keyfile, gateway, hpc_rawdata, hpc_derivatives)
+    return _handle_missing_data(missing, username, hostname, keyfile, gateway)
+
+
+def check_required_data_many(tool: str, dataset: str, participant_labels: List[str], args: Any,
+                             username: str, hostname: str, keyfile: str, gateway: Optional[str],
+                             hpc_rawdata: str, hpc_derivatives: str,
+                             max_workers: int = 16) -> List[Tuple[str, bool]]:
+    """Check required input data on HPC for several participants concurrently.
     
-    # Start building script
-    script = f"""#!/bin/bash
-#SBATCH --job-name={job_name}
-#SBATCH --cpus-per-task={cpus}
-"""
+    The remote probes are independent and latency-bound, so they run in a
+    bounded thread pool sharing one SSH ControlMaster connection, and each
+    remote directory involved is listed only once (see
+    :func:`list_remote_subjects`). Interactive
+    upload prompts are deferred until all probes are done and then handled
+    serially, asking only once per upload destination.
     
-    if partition:
-        script += f"#SBATCH --partition={partition}\n"
+    Parameters
+    ----------
+    tool : str
+        Tool name
+    dataset : str
+        Dataset name
+    participant_labels : List[str]
+        Participant labels
+    args : Any
+        Arguments namespace
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH keyfile path
+    gateway : Optional[str]
+        ProxyJump gateway
+    hpc_rawdata : str
+        HPC rawdata path
+    hpc_derivatives : str
+        HPC derivatives path
+    max_workers : int
+        Maximum number of in-flight checks (default: 16)
+        
+    Returns
+    -------
+    List[Tuple[str, bool]]
+        (participant_label, data_ready) tuples, in input order
+    """
+    if not participant_labels:
+        return []
+    
+    # Make sure all worker threads multiplex over the same connection
+    start_ssh_control_master(username, hostname, keyfile, gateway)
+    
+    missing_by_label: Dict[str, Optional[List[Dict[str, Any]]]] = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(participant_labels))) as executor:
+        futures = {
+            executor.submit(_find_missing_data, tool, dataset, label, args, username, hostname,
+                            keyfile, gateway, hpc_rawdata, hpc_derivatives): label
+            for label in participant_labels
+        }
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                missing_by_label[label] = future.result()
+            except Exception as e:
+                logger.error(f"[sub-{label}] Error checking required data: {e}")
+                missing_by_label[label] = None
+    
+    # Missing subject folders under the same destination (e.g. FreeSurfer
+    # outputs) are offered and streamed together
+    subject_groups: Dict[str, List[Dict[str, Any]]] = {}
+    for label in participant_labels:
+        for entry in missing_by_label[label] or []:
+            if 'subject_dir' in entry:
+                subject_groups.setdefault(entry['upload_path'], []).append(entry)
+    
+    # Prompts are handled serially; several participants usually share the
+    # same upload destination, so each one is only offered once.
+    upload_outcomes: Dict[str, bool] = {}
+    results = []
+    for label in participant_labels:
+        missing = missing_by_label[label]
+        if missing is None:
+            results.append((label, False))
+            continue
+        data_ready = True
+        for entry in missing:
+            if 'subject_dir' in entry:
+                if entry['remote_path'] not in upload_outcomes:
+                    upload_outcomes.update(_upload_missing_subjects(
+                        subject_groups[entry['upload_path']], username, hostname, keyfile, gateway
+                    ))
+                outcome = upload_outcomes[entry['remote_path']]
+            else:
+                upload_path = entry['upload_path']
+                if upload_path not in upload_outcomes:
+                    upload_outcomes[upload_path] = _handle_missing_data(
+                        [entry], username, hostname, keyfile, gateway
+                    )
+                outcome = upload_outcomes[upload_path]
+            if not outcome:
+                data_ready = False
+                break
+        results.append((label, data_ready))
     
-    script += f"""#SBATCH --time={time_limit}
-#SBATCH --mem={memory}
-#SBATCH --output={job_name}_%j.out
-#SBATCH --error={job_name}_%j.err
-"""
+    cache = _list_remote_dir_cached.cache_info()
+    logger.debug(f"Remote listing cache: hits={cache.hits}, misses={cache.misses}")
+    return results
+
+
+def find_remote_t1w_files(hpc_rawdata: str, dataset: str, username: str, hostname: str,
+                          keyfile: str, gateway: Optional[str] = None) -> Dict[str, str]:
+    """Locate the T1w image of every participant of a dataset on the HPC.
     
-    # Add GPU request for GPU-capable tools
-    # fastsurfer: GPU strongly recommended for deep learning segmentation
-    # meld_graph: GPU required for inference
-    if tool == 'fastsurfer':
-        device = getattr(args, 'device', 'auto')
-        if device != 'cpu':
-            script += f"#SBATCH --gres=gpu:{gpus}\n"
-    elif tool == 'meld_graph' and not getattr(args, 'no_gpu', False):
-        script += f"#SBATCH --gres=gpu:{gpus}\n"
+    One depth-bounded ``find`` over the rawdata tree replaces a recursive
+    ``find`` in each job at start-up, which is slow on shared filesystems.
     
-    script += f"""
+    Parameters
+    ----------
+    hpc_rawdata : str
+        Resolved rawdata root on HPC
+    dataset : str
+        Dataset name
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH keyfile path
+    gateway : Optional[str]
+        ProxyJump gateway
+        
+    Returns
+    -------
+    Dict[str, str]
+        Participant label (without 'sub-') -> T1w path; empty on failure
+    """
+    rawdata_dir = f"{hpc_rawdata}/{dataset}-rawdata"
+    cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+        f"find {_quote_remote_path(rawdata_dir)} -mindepth 3 -maxdepth 4 -name '*_T1w.nii.gz' 2>/dev/null"
+    ]
+    paths: List[str] = []
+    try:
+        _run_streamed(cmd, paths.append, timeout=120)
+    except subprocess.TimeoutExpired:
+        logger.warning(f"Timed out listing T1w images under {rawdata_dir}")
+        return {}
+    
+    t1w_files: Dict[str, str] = {}
+    # Sorted so the choice is deterministic when a participant has several
+    for path in sorted(paths):
+        subject_dir = path[len(rawdata_dir):].lstrip('/').split('/', 1)[0]
+        if subject_dir.startswith('sub-'):
+            t1w_files.setdefault(subject_dir[len('sub-'):], path)
+    return t1w_files
+
+
+# File marking a finished participant, relative to <tool>_<version>/ in the
+# dataset derivatives; tools without an entry are always submitted
+_HPC_DONE_SENTINELS: Dict[str, str] = {
+    # Written by the job after its last recon-all stage: every stage leaves
+    # its own recon-all.done, even when a later one fails
+    "freesurfer": "{participant}/scripts/ln2t_tools.done",
+    "fastsurfer": "{participant}/scripts/recon-surf.done",
+    # fMRIPrep and QSIPrep write their sub-*.html report even when the
+    # workflow fails, so the job writes its own marker on success
+    "fmriprep": ".ln2t_tools/{participant}.done",
+    "qsiprep": ".ln2t_tools/{participant}.done",
+}
+
+# Shell tests also accepted as finished, for outputs written before the
+# markers above existed. A single 'recon-all -all' wrote recon-all.done only
+# at the end; it is trusted unless that run failed or never finished.
+_HPC_LEGACY_DONE_CHECKS: Dict[str, str] = {
+    "freesurfer": ('test -e "{participant}/scripts/recon-all.done"'
+                   ' -a ! -e "{participant}/scripts/recon-all.error"'
+                   ' && ! ls "{participant}"/scripts/IsRunning* >/dev/null 2>&1'),
+}
+
+
+def filter_completed_participants(tool: str, dataset: str, participant_labels: List[str],
+                                  args: Any, version: Optional[str] = None) -> List[str]:
+    """Drop participants whose outputs for this tool already exist on the HPC.
+
+    All participants are checked in a single SSH call against the tool's
+    completion marker (see ``_HPC_DONE_SENTINELS`` and
+    ``_HPC_LEGACY_DONE_CHECKS``), so re-running a partly processed cohort
+    only submits the missing ones. Skipped when
+    ``--hpc-force`` is given or the tool has no known marker.
+
+    Parameters
+    ----------
+    tool : str
+        Tool name
+    dataset : str
+        Dataset name
+    participant_labels : List[str]
+        Participant labels (without 'sub-')
+    args : Any
+        Arguments namespace (HPC settings, hpc_force)
+    version : Optional[str]
+        Tool version (default: args.version, then the version the job
+        script falls back to)
+
+    Returns
+    -------
+    List[str]
+        Participant labels still to be processed, in the given order
+    """
+    sentinel = _HPC_DONE_SENTINELS.get(tool)
+    version = version or getattr(args, 'version', None) or _HPC_FALLBACK_VERSIONS.get(tool)
+    if getattr(args, 'hpc_force', False) or not sentinel or not version or not participant_labels:
+        return participant_labels
+
+    username = args.hpc_username
+    hostname = args.hpc_hostname
+    keyfile = args.hpc_keyfile
+    gateway = getattr(args, 'hpc_gateway', None)
+    hpc_derivatives = getattr(args, 'hpc_derivatives', None) or '$GLOBALSCRATCH/derivatives'
+    hpc_derivatives = resolve_hpc_env_var(hpc_derivatives, username, hostname, keyfile, gateway)
+    output_dir = f"{hpc_derivatives}/{dataset}-derivatives/{tool}_{version}"
+
+    subjects = " ".join(shlex.quote(f"sub-{label}") for label in participant_labels)
+    done_check = f'test -e "{sentinel.format(participant="$p")}"'
+    if tool in _HPC_LEGACY_DONE_CHECKS:
+        done_check += f" || {{ {_HPC_LEGACY_DONE_CHECKS[tool].format(participant='$p')}; }}"
+    cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+        f"cd {_quote_remote_path(output_dir)} 2>/dev/null || exit 0; "
+        f"for p in {subjects}; do {{ {done_check}; }} && echo \"$p\"; done; exit 0"
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+    except subprocess.TimeoutExpired:
+        logger.warning(f"Timed out checking existing {tool} outputs on HPC; submitting all participants")
+        return participant_labels
+    if result.returncode != 0:
+        logger.warning(f"Could not check existing {tool} outputs on HPC: {result.stderr.strip()}")
+        return participant_labels
+
+    done = {line[len('sub-'):] for line in result.stdout.split()}
+    remaining = [label for label in participant_labels if label not in done]
+    skipped = len(participant_labels) - len(remaining)
+    if skipped:
+        logger.info(f"Skipping {skipped} participant(s) with existing {tool} {version} outputs on HPC "
+                    f"(use --hpc-force to resubmit)")
+    return remaining
+
+
+# Per-participant SLURM script pieces, rendered with str.format_map in
+# generate_hpc_script. Defined once at import time so each submission only
+# fills in placeholders; literal shell braces are doubled.
+_HPC_SCRIPT_PREAMBLE_TEMPLATE = """
 # Print job information
 echo "Job started at: $(date)"
 echo "Running on node: $(hostname)"
@@ -1180,18 +2333,100 @@ echo "Memory: {memory}"
 HPC_RAWDATA="{hpc_rawdata}"
 HPC_DERIVATIVES="{hpc_derivatives}"
 DATASET="{dataset}"
-PARTICIPANT="sub-{participant_label}"
 TOOL_ARGS="{tool_args}"
+
+# Give job steps and OpenMP code (e.g. recon-all) every allocated CPU,
+# one thread per core
+export SRUN_CPUS_PER_TASK=$SLURM_CPUS_PER_TASK
+export OMP_NUM_THREADS=${{SLURM_CPUS_PER_TASK:-1}}
+export OMP_PLACES=cores
 """
-    
-    # Tool-specific command generation
-    if tool == "freesurfer":
-        version = getattr(args, 'version', '7.3.2')
-        fs_license = getattr(args, 'hpc_fs_license', None) or '$HOME/licenses/license.txt'
-        apptainer_img = f"{hpc_apptainer_dir}/freesurfer.freesurfer.{version}.sif"
-        output_dir = f"$HPC_DERIVATIVES/$DATASET-derivatives/freesurfer_{version}"
-        
-        script += f"""
+
+_HPC_ARRAY_PARTICIPANT_TEMPLATE = """
+# Pick this task's participant (and T1w, if known) from the list below
+IFS=$'\\t' read -r PARTICIPANT_LABEL T1W_FILE < <(sed -n "${{SLURM_ARRAY_TASK_ID}}p" <<'SUBJECTS'
+{subject_list}
+SUBJECTS
+)
+PARTICIPANT="sub-$PARTICIPANT_LABEL"
+"""
+
+_HPC_SINGLE_PARTICIPANT_TEMPLATE = """PARTICIPANT_LABEL="{participant_label}"
+PARTICIPANT="sub-$PARTICIPANT_LABEL"
+T1W_FILE="{t1w_file}"
+"""
+
+_HPC_SCRIPT_FOOTER = """
+echo "Job finished at: $(date)"
+"""
+
+# SLURM resources per tool when --hpc-cpus/--hpc-mem/--hpc-gpus are not given.
+# FreeSurfer gains little past 4 threads, fastsurfer and meld_graph do their
+# heavy lifting on the GPU, the nipreps pipelines scale further.
+_TOOL_RESOURCE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "freesurfer": {"cpus": 4, "mem": "16G"},
+    "fastsurfer": {"cpus": 4, "mem": "24G", "gpus": 1},
+    "fmriprep": {"cpus": 8, "mem": "24G"},
+    "qsiprep": {"cpus": 8, "mem": "32G"},
+    "qsirecon": {"cpus": 8, "mem": "32G"},
+    "meld_graph": {"cpus": 4, "mem": "16G", "gpus": 1},
+    "cvrmap": {"cpus": 4, "mem": "16G"},
+}
+_HPC_RESOURCE_FALLBACK: Dict[str, Any] = {"cpus": 8, "mem": "32G", "gpus": 1}
+
+# Image versions used when args carries none (normally set from the tool's
+# CLI); the same defaults main() checks and builds the HPC images for
+_HPC_FALLBACK_VERSIONS: Dict[str, str] = {
+    "freesurfer": DEFAULT_FS_VERSION,
+    "fastsurfer": DEFAULT_FASTSURFER_VERSION,
+    "fmriprep": DEFAULT_FMRIPREP_VERSION,
+    "qsiprep": DEFAULT_QSIPREP_VERSION,
+    "qsirecon": DEFAULT_QSIRECON_VERSION,
+    "meld_graph": DEFAULT_MELDGRAPH_VERSION,
+    "cvrmap": DEFAULT_CVRMAP_VERSION,
+}
+
+# MELD BIDS config, identical for every participant and dataset
+_MELD_BIDS_CONFIG_JSON = json.dumps({
+    "T1": {"session": None, "datatype": "anat", "suffix": "T1w"},
+    "FLAIR": {"session": None, "datatype": "anat", "suffix": "FLAIR"},
+}, indent=2)
+
+# Copies the container image to node-local disk once per node (array tasks on
+# the same node wait on the lock, then share the copy) and points $SIF at it.
+# Falls back to the image on shared storage if the copy fails.
+_HPC_SIF_STAGE_TEMPLATE = """
+# Stage the container image on node-local disk
+SIF_SRC="{apptainer_img}"
+SIF_CACHE="${{LOCALSCRATCH:-/tmp}}/ln2t_sif"
+SIF="$SIF_CACHE/$(basename "$SIF_SRC")"
+mkdir -p "$SIF_CACHE"
+if ! flock "$SIF.lock" sh -c 'test "$1" -nt "$2" || {{ cp "$2" "$1.$$" && mv -f "$1.$$" "$1"; }} || {{ rm -f "$1.$$"; exit 1; }}' sh "$SIF" "$SIF_SRC"; then
+    echo "WARNING: could not stage $SIF_SRC on this node, using it from shared storage"
+    SIF="$SIF_SRC"
+fi
+echo "Using container image: $SIF"
+"""
+
+# Completion marker of tools whose own outputs do not tell success apart
+# from failure (see _HPC_DONE_SENTINELS): cleared before the tool runs and
+# written only if it exits with status 0
+_HPC_DONE_MARKER_START = """
+# Marks the participant as finished once the tool has succeeded
+DONE_MARKER="$OUTPUT_DIR/.ln2t_tools/$PARTICIPANT.done"
+rm -f "$DONE_MARKER"
+"""
+_HPC_DONE_MARKER_END = """TOOL_STATUS=$?
+if [ $TOOL_STATUS -ne 0 ]; then
+    echo "ERROR: processing failed for $PARTICIPANT (exit status $TOOL_STATUS)"
+    exit $TOOL_STATUS
+fi
+mkdir -p "$OUTPUT_DIR/.ln2t_tools" && date > "$DONE_MARKER"
+"""
+
+# Tool command templates, keyed by tool (fMRIPrep has one per FreeSurfer mode)
+_HPC_TOOL_TEMPLATES: Dict[str, str] = {
+    "freesurfer": """
 # FreeSurfer setup
 FS_LICENSE="{fs_license}"
 OUTPUT_DIR="{output_dir}"
@@ -1201,8 +2436,10 @@ mkdir -p "$OUTPUT_DIR"
 export TMPDIR="${{LOCALSCRATCH:-/tmp}}/${{SLURM_JOB_ID:-$$}}"
 mkdir -p "$TMPDIR"
 
-# Find T1w image for this participant
-T1W_FILE=$(find "$HPC_RAWDATA/$DATASET-rawdata/$PARTICIPANT" -name "*_T1w.nii.gz" | head -1)
+# Find T1w image for this participant (unless it was listed at submission)
+if [ -z "$T1W_FILE" ]; then
+    T1W_FILE=$(find "$HPC_RAWDATA/$DATASET-rawdata/$PARTICIPANT" -name "*_T1w.nii.gz" | head -1)
+fi
 if [ -z "$T1W_FILE" ]; then
     echo "ERROR: No T1w file found for $PARTICIPANT"
     exit 1
@@ -1212,42 +2449,98 @@ echo "Using T1w file: $T1W_FILE"
 # Convert host path to container path
 T1W_CONTAINER_PATH="/data/$PARTICIPANT/anat/$(basename "$T1W_FILE")"
 
-# Run FreeSurfer
-apptainer exec \\
-    -B "$HPC_RAWDATA/$DATASET-rawdata:/data:ro" \\
-    -B "$OUTPUT_DIR:/output" \\
-    -B "$FS_LICENSE:/usr/local/freesurfer/.license:ro" \\
-    -B "$FS_LICENSE:/opt/freesurfer/.license:ro" \\
-    -B "$TMPDIR:/tmp" \\
-    --env SUBJECTS_DIR=/output \\
-    --env TMPDIR=/tmp \\
-    --env FS_LICENSE=/usr/local/freesurfer/.license \\
-    {apptainer_img} \\
-    recon-all -s "$PARTICIPANT" -i "$T1W_CONTAINER_PATH" -all $TOOL_ARGS
+# Run FreeSurfer in coarse stages: the volume stages use every CPU, then
+# the two hemispheres run side by side with half of them each, then the
+# stages that need both hemispheres
+THREADS=${{SLURM_CPUS_PER_TASK:-1}}
+HEMI_THREADS=$(( THREADS > 1 ? THREADS / 2 : 1 ))
+
+# Pass-through options: extra inputs (-T2/-FLAIR <file>) are imported once,
+# with the first stage; thread options are dropped since each stage sets
+# -openmp itself; the rest (-3T, -hires, -expert <file>, -T2pial, ...) is
+# given to every stage, as recon-all does not remember it between runs
+FS_INPUT_ARGS=()
+FS_STAGE_ARGS=()
+split_tool_args() {{
+    while [ $# -gt 0 ]; do
+        case "$1" in
+            -T2|-FLAIR) FS_INPUT_ARGS+=("$1" "$2"); shift ;;
+            -openmp|-threads) echo "WARNING: ignoring '$1 $2', threads follow the job's CPUs"; shift ;;
+            -parallel) echo "WARNING: ignoring -parallel, hemispheres already run in parallel" ;;
+            *) FS_STAGE_ARGS+=("$1") ;;
+        esac
+        shift
+    done
+}}
+split_tool_args $TOOL_ARGS
+
+run_recon_all() {{
+    {apptainer} \\
+    recon-all -s "$PARTICIPANT" "$@" "${{FS_STAGE_ARGS[@]}}"
+}}
+run_hemi() {{
+    # Runs in the background: the settings only apply to this hemisphere
+    # (SLURM_OVERLAP lets both srun steps share the allocation)
+    export OMP_NUM_THREADS=$HEMI_THREADS SRUN_CPUS_PER_TASK=$HEMI_THREADS SLURM_OVERLAP=1
+    run_recon_all -autorecon-hemi "$1" -openmp "$HEMI_THREADS"
+}}
+
+# Marks the participant as finished once every stage has run (see
+# _HPC_DONE_SENTINELS)
+FS_DONE="$OUTPUT_DIR/$PARTICIPANT/scripts/ln2t_tools.done"
+rm -f "$FS_DONE"
+
+# A subject left by an earlier run is processed again in place: its T1w is
+# already imported (recon-all -i refuses existing subjects), and this job is
+# the only one working on it, so leftover IsRunning files are stale
+FS_IMPORT_ARGS=(-i "$T1W_CONTAINER_PATH")
+if [ -e "$OUTPUT_DIR/$PARTICIPANT/mri/orig/001.mgz" ]; then
+    FS_IMPORT_ARGS=()
+    rm -f "$OUTPUT_DIR/$PARTICIPANT"/scripts/IsRunning*
+fi
+
+FS_STATUS=0
+run_recon_all "${{FS_IMPORT_ARGS[@]}}" "${{FS_INPUT_ARGS[@]}}" -autorecon1 -openmp "$THREADS" &&
+    run_recon_all -autorecon2-volonly -openmp "$THREADS" || FS_STATUS=1
+if [ $FS_STATUS -eq 0 ]; then
+    run_hemi lh &
+    LH_PID=$!
+    run_hemi rh &
+    RH_PID=$!
+    wait $LH_PID || FS_STATUS=1
+    wait $RH_PID || FS_STATUS=1
+fi
+# Finish instead of a closing -all, which would redo every stage. autorecon3
+# runs sphere, surfreg, jacobian_white, avgcurv, cortparc, pial, cortribbon,
+# parcstats, cortparc2, parcstats2, cortparc3, parcstats3, pctsurfcon,
+# hyporelabel, aparc2aseg, apas2aseg, segstats, wmparc and balabels; the
+# per-hemisphere steps ran above, the ones reading both hemispheres (plus
+# balabels, which is cheap) run here in the same order
+if [ $FS_STATUS -eq 0 ]; then
+    run_recon_all -cortribbon -hyporelabel -aparc2aseg -apas2aseg -segstats -wmparc \\
+        -balabels -openmp "$THREADS" || FS_STATUS=1
+fi
 
 # Cleanup temp directory
 rm -rf "$TMPDIR"
-"""
-    
-    elif tool == "fastsurfer":
-        version = getattr(args, 'version', 'v2.4.2')
-        fs_license = getattr(args, 'hpc_fs_license', None) or '$HOME/licenses/license.txt'
-        apptainer_img = f"{hpc_apptainer_dir}/deepmi.fastsurfer.{version}.sif"
-        output_dir = f"$HPC_DERIVATIVES/$DATASET-derivatives/fastsurfer_{version}"
-        
-        # GPU support - check for --device cpu or --no-gpu in tool_args
-        gpu_flag = "--nv"
-        if '--device cpu' in tool_args or 'device=cpu' in tool_args:
-            gpu_flag = ""
-        
-        script += f"""
+
+if [ $FS_STATUS -ne 0 ]; then
+    echo "ERROR: recon-all failed for $PARTICIPANT"
+    exit 1
+fi
+date > "$FS_DONE"
+""",
+
+    "fastsurfer": """
 # FastSurfer setup
 FS_LICENSE="{fs_license}"
 OUTPUT_DIR="{output_dir}"
 mkdir -p "$OUTPUT_DIR"
 
-# Find T1w image for this participant
-T1W_FILE=$(find "$HPC_RAWDATA/$DATASET-rawdata/$PARTICIPANT" -name "*_T1w.nii.gz" | head -1)
+# Find T1w image for this participant (unless it was listed at submission)
+if [ -z "$T1W_FILE" ]; then
+    T1W_FILE=$(find "$HPC_RAWDATA/$DATASET-rawdata/$PARTICIPANT" -name "*_T1w.nii.gz" | head -1)
+fi
 if [ -z "$T1W_FILE" ]; then
     echo "ERROR: No T1w file found for $PARTICIPANT"
     exit 1
@@ -1255,58 +2548,32 @@ fi
 echo "Using T1w file: $T1W_FILE"
 
 # Run FastSurfer
-apptainer exec {gpu_flag} \\
-    -B "$HPC_RAWDATA/$DATASET-rawdata:/data:ro" \\
-    -B "$OUTPUT_DIR:/output" \\
-    -B "$FS_LICENSE:/opt/freesurfer/license.txt:ro" \\
-    --env FS_LICENSE=/opt/freesurfer/license.txt \\
-    {apptainer_img} \\
+{apptainer} \\
     /fastsurfer/run_fastsurfer.sh \\
     --sd /output \\
     --sid $PARTICIPANT \\
     --t1 "$T1W_FILE" \\
     --fs_license /opt/freesurfer/license.txt \\
     $TOOL_ARGS
-"""
-    
-    elif tool == "fmriprep":
-        from ln2t_tools.utils.defaults import DEFAULT_FMRIPREP_FS_VERSION
-        version = getattr(args, 'version', '25.1.4')
-        fs_version = DEFAULT_FMRIPREP_FS_VERSION
-        fs_license = getattr(args, 'hpc_fs_license', None) or '$HOME/licenses/license.txt'
-        allow_fs_reconall = getattr(args, 'fmriprep_reconall', False)
-        apptainer_img = f"{hpc_apptainer_dir}/nipreps.fmriprep.{version}.sif"
-        output_dir = f"$HPC_DERIVATIVES/$DATASET-derivatives/fmriprep_{version}"
-        fs_output_dir = f"$HPC_DERIVATIVES/$DATASET-derivatives/freesurfer_{fs_version}"
-        
-        # Handle FreeSurfer inputs based on --fmriprep-reconall flag
-        if allow_fs_reconall:
-            # User allows fMRIPrep to run reconstruction
-            script += f"""
+""",
+
+    "fmriprep_reconall": """
 # fMRIPrep setup - allowing FreeSurfer reconstruction
 FS_LICENSE="{fs_license}"
 OUTPUT_DIR="{output_dir}"
 WORK_DIR="$OUTPUT_DIR/work"
 mkdir -p "$OUTPUT_DIR" "$WORK_DIR"
-
+""" + _HPC_DONE_MARKER_START + """
 # Run fMRIPrep (will run FreeSurfer if needed)
-apptainer run \\
-    -B "$HPC_RAWDATA/$DATASET-rawdata:/data:ro" \\
-    -B "$OUTPUT_DIR:/out" \\
-    -B "$WORK_DIR:/work" \\
-    -B "$FS_LICENSE:/opt/freesurfer/license.txt:ro" \\
-    --env FS_LICENSE=/opt/freesurfer/license.txt \\
-    --cleanenv \\
-    {apptainer_img} \\
+{apptainer} \\
     /data /out participant \\
-    --participant-label {participant_label} \\
+    --participant-label $PARTICIPANT_LABEL \\
     -w /work \\
     --skip-bids-validation \\
     $TOOL_ARGS
-"""
-        else:
-            # FreeSurfer is pre-computed and required
-            script += f"""
+""" + _HPC_DONE_MARKER_END,
+
+    "fmriprep": """
 # fMRIPrep setup - using pre-computed FreeSurfer
 FS_LICENSE="{fs_license}"
 OUTPUT_DIR="{output_dir}"
@@ -1321,186 +2588,618 @@ if [ ! -d "$FS_SUBJECTS_DIR/$PARTICIPANT" ]; then
     echo "Either run FreeSurfer first or use --fmriprep-reconall to allow reconstruction."
     exit 1
 fi
-
+""" + _HPC_DONE_MARKER_START + """
 # Run fMRIPrep with pre-computed FreeSurfer outputs
-apptainer run \\
-    -B "$HPC_RAWDATA/$DATASET-rawdata:/data:ro" \\
-    -B "$OUTPUT_DIR:/out" \\
-    -B "$WORK_DIR:/work" \\
-    -B "$FS_SUBJECTS_DIR:/fsdir" \\
-    -B "$FS_LICENSE:/opt/freesurfer/license.txt:ro" \\
-    --env FS_LICENSE=/opt/freesurfer/license.txt \\
-    --env SUBJECTS_DIR=/fsdir \\
-    --cleanenv \\
-    {apptainer_img} \\
+{apptainer} \\
     /data /out participant \\
-    --participant-label {participant_label} \\
+    --participant-label $PARTICIPANT_LABEL \\
     -w /work \\
     --fs-subjects-dir /fsdir \\
     --skip-bids-validation \\
     $TOOL_ARGS
-"""
+""" + _HPC_DONE_MARKER_END,
+
+    "qsiprep": """
+# QSIPrep setup
+OUTPUT_DIR="{output_dir}"
+WORK_DIR="$GLOBALSCRATCH/qsiprep_work"
+mkdir -p "$OUTPUT_DIR" "$WORK_DIR"
+""" + _HPC_DONE_MARKER_START + """
+# Run QSIPrep
+{apptainer} \\
+    /data /out participant \\
+    --participant-label $PARTICIPANT_LABEL \\
+    --skip-bids-validation \\
+    --work-dir /tmp/work/work \\
+    $TOOL_ARGS
+""" + _HPC_DONE_MARKER_END,
+
+    "qsirecon": """
+# QSIRecon setup
+FS_LICENSE="{fs_license}"
+OUTPUT_DIR="{output_dir}"
+QSIPREP_DIR="{qsiprep_dir}"
+CODE_DIR="{code_dir}"
+WORK_DIR="$OUTPUT_DIR/work"
+mkdir -p "$OUTPUT_DIR" "$WORK_DIR"
+
+# Run QSIRecon
+{apptainer} \\
+    /data /out participant \\
+    --participant-label $PARTICIPANT_LABEL \\
+    --fs-license-file /opt/freesurfer/license.txt \\
+    -w /work \\
+    $TOOL_ARGS
+""",
+
+    "meld_graph": """
+# MELD Graph setup
+MELD_VERSION="{version}"
+MELD_DATA_DIR="$HPC_DERIVATIVES/$DATASET-derivatives/meld_graph_$MELD_VERSION/data"
+mkdir -p "$MELD_DATA_DIR/input" "$MELD_DATA_DIR/output/predictions_reports"
+
+# Create MELD config files once per dataset (written via mv so concurrent
+# array tasks never read a partial file)
+if [ ! -f "$MELD_DATA_DIR/input/meld_bids_config.json" ]; then
+    cat > "$MELD_DATA_DIR/input/meld_bids_config.json.$$" << 'EOF'
+{meld_bids_config}
+EOF
+    mv -f "$MELD_DATA_DIR/input/meld_bids_config.json.$$" "$MELD_DATA_DIR/input/meld_bids_config.json"
+fi
+
+if [ ! -f "$MELD_DATA_DIR/input/dataset_description.json" ]; then
+    cat > "$MELD_DATA_DIR/input/dataset_description.json.$$" << 'EOF'
+{dataset_description}
+EOF
+    mv -f "$MELD_DATA_DIR/input/dataset_description.json.$$" "$MELD_DATA_DIR/input/dataset_description.json"
+fi
+
+# Link this participant's rawdata (each job or array task links its own;
+# -n replaces an existing link instead of creating one inside it)
+if [ -d "$HPC_RAWDATA/$DATASET-rawdata/$PARTICIPANT" ]; then
+    ln -sfn "$HPC_RAWDATA/$DATASET-rawdata/$PARTICIPANT" "$MELD_DATA_DIR/input/$PARTICIPANT"
+fi
+
+# Run MELD
+{apptainer} \\
+    python scripts/new_patient_pipeline/new_pt_pipeline.py -id $PARTICIPANT $TOOL_ARGS
+""",
+
+    "cvrmap": """
+# CVRmap setup
+DERIVATIVES_DIR="{derivatives_dir}"
+OUTPUT_LABEL="{output_label}"
+FMRIPREP_DIR="{fmriprep_dir}"
+mkdir -p "$DERIVATIVES_DIR/$OUTPUT_LABEL"
+
+# Run CVRmap
+{apptainer} \\
+    /data /derivatives/$OUTPUT_LABEL participant \\
+    --participant-label $PARTICIPANT_LABEL \\
+    --derivatives fmriprep=/fmriprep \\
+    $TOOL_ARGS
+""",
+}
+
+
+def generate_hpc_script(
+    tool: str,
+    participant_label: str,
+    dataset: str,
+    args: Any,
+    hpc_rawdata: str,
+    hpc_derivatives: str,
+    hpc_apptainer_dir: str,
+    array_participants: Optional[List[str]] = None,
+    t1w_files: Optional[Dict[str, str]] = None
+) -> str:
+    """Generate HPC batch script for job submission.
+    
+    This function generates SLURM batch scripts with tool_args pass-through.
+    Tool-specific arguments should be provided via --tool-args on the CLI.
+    
+    Parameters
+    ----------
+    tool : str
+        Tool name (e.g., 'meld_graph', 'freesurfer', 'fmriprep')
+    participant_label : str
+        Subject/participant label
+    dataset : str
+        Dataset name
+    args : argparse.Namespace
+        Parsed command line arguments (includes tool_args)
+    hpc_rawdata : str
+        Path to rawdata on HPC (can be None to use $GLOBALSCRATCH/rawdata)
+    hpc_derivatives : str
+        Path to derivatives on HPC (can be None to use $GLOBALSCRATCH/derivatives)
+    hpc_apptainer_dir : str
+        Path to apptainer images on HPC
+    array_participants : Optional[List[str]]
+        If given, generate a SLURM array script with one task per listed
+        participant instead of a script for participant_label alone
+    t1w_files : Optional[Dict[str, str]]
+        T1w image per participant label on HPC (see find_remote_t1w_files);
+        participants not listed fall back to a find at job start
+        
+    Returns
+    -------
+    str
+        HPC batch script content
+    """
+    return render_hpc_script(
+        prepare_tool_context(tool, dataset, args, hpc_rawdata, hpc_derivatives, hpc_apptainer_dir),
+        participant_label,
+        array_participants=array_participants,
+        t1w_files=t1w_files
+    )
+
+
+# sbatch options the job script depends on, which --hpc-sbatch-option may
+# not override: the dedicated flag (if any) also updates the script body
+_RESERVED_SBATCH_OPTIONS: Dict[str, Optional[str]] = {
+    "cpus-per-task": "--hpc-cpus",
+    "c": "--hpc-cpus",
+    "mem": "--hpc-mem",
+    "cpu-freq": "--hpc-cpu-freq",
+    "array": "--hpc-array-concurrency",
+    "a": "--hpc-array-concurrency",
+    "job-name": None,
+    "J": None,
+    "output": None,
+    "o": None,
+    "error": None,
+    "e": None,
+}
+
+
+def _parse_sbatch_options(options: Optional[List[str]]) -> Dict[str, str]:
+    """Turn ``--hpc-sbatch-option`` values into a directive mapping.
+    
+    Options the job script depends on (see ``_RESERVED_SBATCH_OPTIONS``),
+    such as the CPU count it hands to the tool or the job name and log
+    files used to track the job, are rejected.
+    
+    Parameters
+    ----------
+    options : Optional[List[str]]
+        'KEY=VALUE' strings, KEY being a long sbatch option without dashes
+        (e.g. 'qos=long', 'constraint=skylake')
+    
+    Returns
+    -------
+    Dict[str, str]
+        Directive name -> value
+    
+    Raises
+    ------
+    ValueError
+        If an option is not of the form KEY=VALUE or may not be overridden
+    """
+    parsed = {}
+    for option in options or []:
+        key, sep, value = option.partition('=')
+        key = key.strip().lstrip('-')
+        if not sep or not key:
+            raise ValueError(f"Invalid --hpc-sbatch-option '{option}', expected KEY=VALUE")
+        if key in _RESERVED_SBATCH_OPTIONS:
+            flag = _RESERVED_SBATCH_OPTIONS[key]
+            raise ValueError(
+                f"--hpc-sbatch-option cannot set '{key}'"
+                + (f", use {flag} instead" if flag else ", ln2t_tools sets it to track the job")
+            )
+        parsed[key] = value.strip()
+    return parsed
+
+
+def _apptainer_command(
+    binds: List[str],
+    env: Optional[Dict[str, str]] = None,
+    gpu: bool = False,
+    run: bool = False,
+    options: Optional[List[str]] = None
+) -> str:
+    """Render the ``apptainer exec``/``run`` call of a job script.
+    
+    The image is always the node-local copy made by the staging block
+    (``$SIF``); the tool's own arguments follow it in the template.
+    
+    Parameters
+    ----------
+    binds : List[str]
+        Bind specifications (HOST:CONTAINER[:MODE]), may use script variables
+    env : Optional[Dict[str, str]]
+        Environment variables to set inside the container
+    gpu : bool
+        Whether to pass --nv
+    run : bool
+        Use ``apptainer run`` instead of ``apptainer exec``
+    options : Optional[List[str]]
+        Other apptainer options (e.g. '--cleanenv')
+    
+    Returns
+    -------
+    str
+        The command, one option per continued line, ending with the image
+    """
+    first_line = ["apptainer", "run" if run else "exec"]
+    if gpu:
+        first_line.append("--nv")
+    first_line += options or []
+    
+    lines = [" ".join(first_line)]
+    lines += [f'-B "{bind}"' for bind in binds]
+    lines += [f"--env {name}={value}" for name, value in (env or {}).items()]
+    lines.append('"$SIF"')
+    return " \\\n    ".join(lines)
+
+
+def prepare_tool_context(
+    tool: str,
+    dataset: str,
+    args: Any,
+    hpc_rawdata: str,
+    hpc_derivatives: str,
+    hpc_apptainer_dir: str
+) -> Dict[str, Any]:
+    """Render the participant-independent parts of a tool's HPC script.
+    
+    Resources, the job preamble and the tool command are the same for every
+    participant of a submission, so they are built once here and reused by
+    :func:`render_hpc_script` for each participant (or array job).
+    
+    Parameters
+    ----------
+    tool : str
+        Tool name (e.g., 'meld_graph', 'freesurfer', 'fmriprep')
+    dataset : str
+        Dataset name
+    args : argparse.Namespace
+        Parsed command line arguments (includes tool_args)
+    hpc_rawdata : str
+        Path to rawdata on HPC (can be None to use $GLOBALSCRATCH/rawdata)
+    hpc_derivatives : str
+        Path to derivatives on HPC (can be None to use $GLOBALSCRATCH/derivatives)
+    hpc_apptainer_dir : str
+        Path to apptainer images on HPC
+    
+    Returns
+    -------
+    Dict[str, Any]
+        Tool context for render_hpc_script, including the HPC paths used
+    
+    Raises
+    ------
+    NotImplementedError
+        If HPC submission is not supported for the tool
+    """
+    # Get tool_args for pass-through
+    tool_args = getattr(args, 'tool_args', '') or ''
+    
+    # Paths should be resolved by caller - these are fallbacks
+    if not hpc_rawdata:
+        logger.warning("hpc_rawdata not provided to generate_hpc_script - using $GLOBALSCRATCH fallback")
+        hpc_rawdata = "$GLOBALSCRATCH/rawdata"
+    if not hpc_derivatives:
+        logger.warning("hpc_derivatives not provided to generate_hpc_script - using $GLOBALSCRATCH fallback")
+        hpc_derivatives = "$GLOBALSCRATCH/derivatives"
+    
+    # Read every setting from args once, here
+    version = getattr(args, 'version', None) or _HPC_FALLBACK_VERSIONS.get(tool)
+    fs_license = getattr(args, 'hpc_fs_license', None) or '$HOME/licenses/license.txt'
+    device = getattr(args, 'device', 'auto')
+    no_gpu = getattr(args, 'no_gpu', False)
+    fmriprep_reconall = getattr(args, 'fmriprep_reconall', False)
+    sbatch_options = getattr(args, 'hpc_sbatch_options', None)
+    cpu_freq = getattr(args, 'hpc_cpu_freq', None)
+    array_concurrency = getattr(args, 'hpc_array_concurrency', 4)
+    
+    # Get partition and resource settings; resources not given on the
+    # command line come from the tool's profile
+    resource_defaults = _TOOL_RESOURCE_DEFAULTS.get(tool, _HPC_RESOURCE_FALLBACK)
+    partition = getattr(args, 'hpc_partition', None)
+    time_limit = getattr(args, 'hpc_time', '24:00:00')  # Default 24 hours for most tools
+    memory = getattr(args, 'hpc_mem', None) or resource_defaults["mem"]
+    cpus = getattr(args, 'hpc_cpus', None) or resource_defaults["cpus"]
+    gpus = getattr(args, 'hpc_gpus', None) or resource_defaults.get("gpus", 1)
+    
+    # fMRIPrep uses all allocated CPUs per process unless told otherwise;
+    # half of them as OpenMP threads keeps several nodes busy at once
+    if tool == 'fmriprep' and '--omp-nthreads' not in tool_args:
+        tool_args = f"{tool_args} --omp-nthreads {max(1, cpus // 2)}".strip()
+    
+    # SLURM directives shared by all participants (None values are left out)
+    directives: Dict[str, Any] = {
+        "cpus-per-task": cpus,
+        "partition": partition,
+        "time": time_limit,
+        "mem": memory,
+        "cpu-freq": cpu_freq,
+    }
+    
+    # Add GPU request for GPU-capable tools
+    # fastsurfer: GPU strongly recommended for deep learning segmentation
+    # meld_graph: GPU required for inference
+    if tool == 'fastsurfer':
+        if device != 'cpu':
+            directives["gres"] = f"gpu:{gpus}"
+    elif tool == 'meld_graph' and not no_gpu:
+        directives["gres"] = f"gpu:{gpus}"
+    
+    # --hpc-sbatch-option KEY=VALUE overrides or adds any directive
+    directives.update(_parse_sbatch_options(sbatch_options))
+    
+    preamble = _HPC_SCRIPT_PREAMBLE_TEMPLATE.format_map({
+        'cpus': cpus,
+        'memory': memory,
+        'hpc_rawdata': hpc_rawdata,
+        'hpc_derivatives': hpc_derivatives,
+        'dataset': dataset,
+        'tool_args': tool_args,
+    })
+    
+    # Tool-specific values for the command template
+    template_key = tool
+    if tool == "freesurfer":
+        context = {
+            'fs_license': fs_license,
+            'apptainer_img': f"{hpc_apptainer_dir}/freesurfer.freesurfer.{version}.sif",
+            'output_dir': f"$HPC_DERIVATIVES/$DATASET-derivatives/freesurfer_{version}",
+            'apptainer': _apptainer_command(
+                binds=["$HPC_RAWDATA/$DATASET-rawdata:/data:ro",
+                       "$OUTPUT_DIR:/output",
+                       "$FS_LICENSE:/usr/local/freesurfer/.license:ro",
+                       "$FS_LICENSE:/opt/freesurfer/.license:ro",
+                       "$TMPDIR:/tmp"],
+                env={"SUBJECTS_DIR": "/output",
+                     "TMPDIR": "/tmp",
+                     "FS_LICENSE": "/usr/local/freesurfer/.license"},
+            ),
+        }
+    
+    elif tool == "fastsurfer":
+        # GPU support - check for --device cpu or --no-gpu in tool_args
+        use_gpu = not ('--device cpu' in tool_args or 'device=cpu' in tool_args)
+        context = {
+            'fs_license': fs_license,
+            'apptainer_img': f"{hpc_apptainer_dir}/deepmi.fastsurfer.{version}.sif",
+            'output_dir': f"$HPC_DERIVATIVES/$DATASET-derivatives/fastsurfer_{version}",
+            'apptainer': _apptainer_command(
+                binds=["$HPC_RAWDATA/$DATASET-rawdata:/data:ro",
+                       "$OUTPUT_DIR:/output",
+                       "$FS_LICENSE:/opt/freesurfer/license.txt:ro"],
+                env={"FS_LICENSE": "/opt/freesurfer/license.txt"},
+                gpu=use_gpu,
+            ),
+        }
+    
+    elif tool == "fmriprep":
+        from ln2t_tools.utils.defaults import DEFAULT_FMRIPREP_FS_VERSION
+        # Handle FreeSurfer inputs based on --fmriprep-reconall flag
+        binds = ["$HPC_RAWDATA/$DATASET-rawdata:/data:ro",
+                 "$OUTPUT_DIR:/out",
+                 "$WORK_DIR:/work"]
+        env = {"FS_LICENSE": "/opt/freesurfer/license.txt"}
+        if fmriprep_reconall:
+            template_key = "fmriprep_reconall"
+        else:
+            binds.append("$FS_SUBJECTS_DIR:/fsdir")
+            env["SUBJECTS_DIR"] = "/fsdir"
+        binds.append("$FS_LICENSE:/opt/freesurfer/license.txt:ro")
+        context = {
+            'fs_license': fs_license,
+            'apptainer_img': f"{hpc_apptainer_dir}/nipreps.fmriprep.{version}.sif",
+            'output_dir': f"$HPC_DERIVATIVES/$DATASET-derivatives/fmriprep_{version}",
+            'fs_output_dir': f"$HPC_DERIVATIVES/$DATASET-derivatives/freesurfer_{DEFAULT_FMRIPREP_FS_VERSION}",
+            'apptainer': _apptainer_command(binds, env, run=True, options=["--cleanenv"]),
+        }
     
     elif tool == "qsiprep":
-        version = getattr(args, 'version', '1.0.1')
-        apptainer_img = f"{hpc_apptainer_dir}/pennlinc.qsiprep.{version}.sif"
-        output_dir = f"$HPC_DERIVATIVES/$DATASET-derivatives/qsiprep_{version}"
-        
-        script += f"""
-# QSIPrep setup
-OUTPUT_DIR="{output_dir}"
-WORK_DIR="$GLOBALSCRATCH/qsiprep_work"
-mkdir -p "$OUTPUT_DIR" "$WORK_DIR"
-
-# Run QSIPrep
-apptainer run \\
-    -B "$HPC_RAWDATA/$DATASET-rawdata:/data:ro" \\
-    -B "$OUTPUT_DIR:/out" \\
-    -B "$WORK_DIR:/tmp/work" \\
-    -B "$OUTPUT_DIR:/tmp:rw" \\
-    --cleanenv --containall --writable-tmpfs \\
-    --env TMPDIR=/tmp \\
-    {apptainer_img} \\
-    /data /out participant \\
-    --participant-label {participant_label} \\
-    --skip-bids-validation \\
-    --work-dir /tmp/work/work \\
-    $TOOL_ARGS
-
-"""
+        context = {
+            'apptainer_img': f"{hpc_apptainer_dir}/pennlinc.qsiprep.{version}.sif",
+            'output_dir': f"$HPC_DERIVATIVES/$DATASET-derivatives/qsiprep_{version}",
+            'apptainer': _apptainer_command(
+                binds=["$HPC_RAWDATA/$DATASET-rawdata:/data:ro",
+                       "$OUTPUT_DIR:/out",
+                       "$WORK_DIR:/tmp/work",
+                       "$OUTPUT_DIR:/tmp:rw"],
+                env={"TMPDIR": "/tmp"},
+                run=True,
+                options=["--cleanenv", "--containall", "--writable-tmpfs"],
+            ),
+        }
     
     elif tool == "qsirecon":
-        from ln2t_tools.utils.defaults import DEFAULT_QSIPREP_VERSION
-        
-        version = getattr(args, 'version', '1.1.1')
-        fs_license = getattr(args, 'hpc_fs_license', None) or '$HOME/licenses/license.txt'
-        apptainer_img = f"{hpc_apptainer_dir}/pennlinc.qsirecon.{version}.sif"
-        output_dir = f"$HPC_DERIVATIVES/$DATASET-derivatives/qsirecon_{version}"
-        qsiprep_dir = f"$HPC_DERIVATIVES/$DATASET-derivatives/qsiprep_{DEFAULT_QSIPREP_VERSION}"
-        code_dir = f"$GLOBALSCRATCH/code/$DATASET-code"
-        
-        script += f"""
-# QSIRecon setup
-FS_LICENSE="{fs_license}"
-OUTPUT_DIR="{output_dir}"
-QSIPREP_DIR="{qsiprep_dir}"
-CODE_DIR="{code_dir}"
-WORK_DIR="$OUTPUT_DIR/work"
-mkdir -p "$OUTPUT_DIR" "$WORK_DIR"
-
-# Run QSIRecon
-apptainer run --containall --writable-tmpfs \\
-    -B "$FS_LICENSE:/opt/freesurfer/license.txt" \\
-    -B "$QSIPREP_DIR:/data:ro" \\
-    -B "$OUTPUT_DIR:/out" \\
-    -B "$WORK_DIR:/work" \\
-    -B "$CODE_DIR:/code:ro" \\
-    -B "$OUTPUT_DIR:/tmp:rw" \\
-    --env TMPDIR=/tmp \\
-    {apptainer_img} \\
-    /data /out participant \\
-    --participant-label {participant_label} \\
-    --fs-license-file /opt/freesurfer/license.txt \\
-    -w /work \\
-    $TOOL_ARGS
-"""
+        context = {
+            'fs_license': fs_license,
+            'apptainer_img': f"{hpc_apptainer_dir}/pennlinc.qsirecon.{version}.sif",
+            'output_dir': f"$HPC_DERIVATIVES/$DATASET-derivatives/qsirecon_{version}",
+            'qsiprep_dir': f"$HPC_DERIVATIVES/$DATASET-derivatives/qsiprep_{DEFAULT_QSIPREP_VERSION}",
+            'code_dir': "$GLOBALSCRATCH/code/$DATASET-code",
+            'apptainer': _apptainer_command(
+                binds=["$FS_LICENSE:/opt/freesurfer/license.txt",
+                       "$QSIPREP_DIR:/data:ro",
+                       "$OUTPUT_DIR:/out",
+                       "$WORK_DIR:/work",
+                       "$CODE_DIR:/code:ro",
+                       "$OUTPUT_DIR:/tmp:rw"],
+                env={"TMPDIR": "/tmp"},
+                run=True,
+                options=["--containall", "--writable-tmpfs"],
+            ),
+        }
     
     elif tool == "meld_graph":
-        version = getattr(args, 'version', 'v2.2.3')
-        fs_license = getattr(args, 'hpc_fs_license', None) or '$HOME/licenses/license.txt'
-        apptainer_img = f"{hpc_apptainer_dir}/meldproject.meld_graph.{version}.sif"
-        
         # GPU settings - check for --no-gpu in tool_args
-        gpu_flag = "--nv"
-        env_vars = "--env PYTORCH_CUDA_ALLOC_CONF=max_split_size_mb:128 --env CUDA_LAUNCH_BLOCKING=1"
-        if '--no-gpu' in tool_args:
-            gpu_flag = ""
-            env_vars = "--env CUDA_VISIBLE_DEVICES=''"
-        
-        script += f"""
-# MELD Graph setup
-MELD_VERSION="{version}"
-MELD_DATA_DIR="$HPC_DERIVATIVES/$DATASET-derivatives/meld_graph_$MELD_VERSION/data"
-mkdir -p "$MELD_DATA_DIR/input" "$MELD_DATA_DIR/output/predictions_reports"
-
-# Create MELD config files
-cat > "$MELD_DATA_DIR/input/meld_bids_config.json" << 'EOF'
-{{
-  "T1": {{"session": null, "datatype": "anat", "suffix": "T1w"}},
-  "FLAIR": {{"session": null, "datatype": "anat", "suffix": "FLAIR"}}
-}}
-EOF
-
-cat > "$MELD_DATA_DIR/input/dataset_description.json" << 'EOF'
-{{"Name": "{dataset}", "BIDSVersion": "1.6.0"}}
-EOF
-
-# Link rawdata
-for subj_dir in $HPC_RAWDATA/$DATASET-rawdata/sub-*; do
-    if [ -d "$subj_dir" ]; then
-        subj=$(basename $subj_dir)
-        ln -sf "$subj_dir" "$MELD_DATA_DIR/input/$subj"
-    fi
-done
-
-# Run MELD
-apptainer exec {gpu_flag} \\
-    -B "$MELD_DATA_DIR:/data" \\
-    -B "{fs_license}:/license.txt:ro" \\
-    --env FS_LICENSE=/license.txt \\
-    {env_vars} \\
-    {apptainer_img} \\
-    python scripts/new_patient_pipeline/new_pt_pipeline.py -id sub-{participant_label} $TOOL_ARGS
-"""
+        use_gpu = '--no-gpu' not in tool_args
+        env = {"FS_LICENSE": "/license.txt"}
+        if use_gpu:
+            env.update(PYTORCH_CUDA_ALLOC_CONF="max_split_size_mb:128", CUDA_LAUNCH_BLOCKING="1")
+        else:
+            env["CUDA_VISIBLE_DEVICES"] = "''"
+        context = {
+            'version': version,
+            'meld_bids_config': _MELD_BIDS_CONFIG_JSON,
+            'dataset_description': json.dumps({"Name": dataset, "BIDSVersion": "1.6.0"}),
+            'apptainer_img': f"{hpc_apptainer_dir}/meldproject.meld_graph.{version}.sif",
+            'apptainer': _apptainer_command(
+                binds=["$MELD_DATA_DIR:/data", f"{fs_license}:/license.txt:ro"],
+                env=env,
+                gpu=use_gpu,
+            ),
+        }
     
     elif tool == "cvrmap":
         # CVRmap for cerebrovascular reactivity mapping
         # Requires fMRIPrep preprocessed data
         from ln2t_tools.utils.defaults import DEFAULT_CVRMAP_FMRIPREP_VERSION
-        
-        version = getattr(args, 'version', '4.3.1')
-        apptainer_img = f"{hpc_apptainer_dir}/ln2t.cvrmap.{version}.sif"
         # Bind the full derivatives directory (not just cvrmap output) so that
         # files in other subdirectories (e.g., vesseldensitymaps) are accessible
         # via /derivatives/ paths in --tool-args
-        derivatives_dir = f"$HPC_DERIVATIVES/$DATASET-derivatives"
-        output_label = f"cvrmap_{version}"
-        fmriprep_dir = f"$HPC_DERIVATIVES/$DATASET-derivatives/fmriprep_{DEFAULT_CVRMAP_FMRIPREP_VERSION}"
-        
-        script += f"""
-# CVRmap setup
-DERIVATIVES_DIR="{derivatives_dir}"
-OUTPUT_LABEL="{output_label}"
-FMRIPREP_DIR="{fmriprep_dir}"
-mkdir -p "$DERIVATIVES_DIR/$OUTPUT_LABEL"
-
-# Run CVRmap
-apptainer run \\
-    -B "$HPC_RAWDATA/$DATASET-rawdata:/data:ro" \\
-    -B "$DERIVATIVES_DIR:/derivatives" \\
-    -B "$FMRIPREP_DIR:/fmriprep:ro" \\
-    {apptainer_img} \\
-    /data /derivatives/$OUTPUT_LABEL participant \\
-    --participant-label {participant_label} \\
-    --derivatives fmriprep=/fmriprep \\
-    $TOOL_ARGS
-"""
+        context = {
+            'apptainer_img': f"{hpc_apptainer_dir}/ln2t.cvrmap.{version}.sif",
+            'derivatives_dir': "$HPC_DERIVATIVES/$DATASET-derivatives",
+            'output_label': f"cvrmap_{version}",
+            'fmriprep_dir': f"$HPC_DERIVATIVES/$DATASET-derivatives/fmriprep_{DEFAULT_CVRMAP_FMRIPREP_VERSION}",
+            'apptainer': _apptainer_command(
+                binds=["$HPC_RAWDATA/$DATASET-rawdata:/data:ro",
+                       "$DERIVATIVES_DIR:/derivatives",
+                       "$FMRIPREP_DIR:/fmriprep:ro"],
+                run=True,
+            ),
+        }
     
     else:
         raise NotImplementedError(f"HPC submission for {tool} not yet implemented")
     
-    script += """
-echo "Job finished at: $(date)"
-"""
+    # --cpu-freq only applies to job steps, so run the container as one
+    if cpu_freq:
+        context['apptainer'] = f"srun {context['apptainer']}"
+    
+    return {
+        'tool': tool,
+        'dataset': dataset,
+        'hpc_rawdata': hpc_rawdata,
+        'hpc_derivatives': hpc_derivatives,
+        'hpc_apptainer_dir': hpc_apptainer_dir,
+        'directives': directives,
+        'array_concurrency': array_concurrency,
+        'preamble': preamble,
+        'tool_command': (_HPC_SIF_STAGE_TEMPLATE.format_map(context)
+                         + _HPC_TOOL_TEMPLATES[template_key].format_map(context)),
+    }
+
+
+def render_hpc_script(
+    tool_context: Dict[str, Any],
+    participant_label: str,
+    array_participants: Optional[List[str]] = None,
+    t1w_files: Optional[Dict[str, str]] = None
+) -> str:
+    """Render the HPC batch script for one participant (or one array job).
+    
+    Parameters
+    ----------
+    tool_context : Dict[str, Any]
+        Context from prepare_tool_context
+    participant_label : str
+        Subject/participant label
+    array_participants : Optional[List[str]]
+        If given, render a SLURM array script with one task per listed
+        participant instead of a script for participant_label alone
+    t1w_files : Optional[Dict[str, str]]
+        T1w image per participant label on HPC (see find_remote_t1w_files)
+    
+    Returns
+    -------
+    str
+        HPC batch script content
+    """
+    tool = tool_context['tool']
+    dataset = tool_context['dataset']
+    
+    # Determine job name (array tasks are told apart by %A_%a in log names)
+    if array_participants:
+        job_name = f"{tool}-{dataset}-array"
+        log_suffix = "%A_%a"
+    else:
+        job_name = f"{tool}-{dataset}-{participant_label}"
+        log_suffix = "%j"
+    
+    # SLURM directives
+    directives: Dict[str, Any] = {
+        "job-name": job_name,
+        "output": f"{job_name}_{log_suffix}.out",
+        "error": f"{job_name}_{log_suffix}.err",
+    }
+    if array_participants:
+        directives["array"] = f"1-{len(array_participants)}%{tool_context['array_concurrency']}"
+    directives.update(tool_context['directives'])
+    
+    script_parts = ["#!/bin/bash\n"]
+    script_parts.extend(
+        f"#SBATCH --{key}={value}\n" for key, value in directives.items() if value is not None
+    )
+    script_parts.append(tool_context['preamble'])
+    
+    t1w_files = t1w_files or {}
+    if array_participants:
+        subject_list = "\n".join(
+            f"{label}\t{t1w_files.get(label, '')}" for label in array_participants
+        )
+        script_parts.append(_HPC_ARRAY_PARTICIPANT_TEMPLATE.format_map({
+            'subject_list': subject_list,
+        }))
+    else:
+        script_parts.append(_HPC_SINGLE_PARTICIPANT_TEMPLATE.format_map({
+            'participant_label': participant_label,
+            't1w_file': t1w_files.get(participant_label, ''),
+        }))
+    
+    script_parts.append(tool_context['tool_command'])
+    script_parts.append(_HPC_SCRIPT_FOOTER)
+    
+    return "".join(script_parts)
+
+
+def _resolve_hpc_paths(args: Any) -> Tuple[str, str, str]:
+    """Resolve the HPC rawdata, derivatives and apptainer directories.
+    
+    SLURM batch jobs don't have access to login shell environment variables
+    like $GLOBALSCRATCH, so they are resolved to actual paths at submission.
+    
+    Parameters
+    ----------
+    args : Any
+        Arguments namespace (validated HPC settings)
+    
+    Returns
+    -------
+    Tuple[str, str, str]
+        Resolved (rawdata, derivatives, apptainer) directories on HPC
+    """
+    username = args.hpc_username
+    hostname = args.hpc_hostname
+    keyfile = args.hpc_keyfile
+    gateway = getattr(args, 'hpc_gateway', None)
+    
+    hpc_rawdata = getattr(args, 'hpc_rawdata', None) or '$GLOBALSCRATCH/rawdata'
+    hpc_derivatives = getattr(args, 'hpc_derivatives', None) or '$GLOBALSCRATCH/derivatives'
+    hpc_apptainer_dir = args.hpc_apptainer_dir or '$GLOBALSCRATCH/apptainer'
     
-    return script
+    return (
+        resolve_hpc_env_var(hpc_rawdata, username, hostname, keyfile, gateway),
+        resolve_hpc_env_var(hpc_derivatives, username, hostname, keyfile, gateway),
+        resolve_hpc_env_var(hpc_apptainer_dir, username, hostname, keyfile, gateway),
+    )
 
 
 def submit_hpc_job(
     tool: str,
     participant_label: str,
     dataset: str,
-    args: Any
+    args: Any,
+    tool_context: Optional[Dict[str, Any]] = None,
+    t1w_files: Optional[Dict[str, str]] = None
 ) -> Optional[str]:
     """Submit job to HPC cluster.
     
@@ -1514,6 +3213,11 @@ def submit_hpc_job(
         Dataset name
     args : argparse.Namespace
         Parsed command line arguments
+    tool_context : Optional[Dict[str, Any]]
+        Context from prepare_tool_context, shared by several submissions;
+        built here (after checking the connection) when not given
+    t1w_files : Optional[Dict[str, str]]
+        T1w images from find_remote_t1w_files; looked up here when not given
         
     Returns
     -------
@@ -1530,81 +3234,49 @@ def submit_hpc_job(
     keyfile = args.hpc_keyfile
     gateway = getattr(args, 'hpc_gateway', None)
     
-    # Test SSH connection
-    if not test_ssh_connection(username, hostname, keyfile, gateway):
-        logger.error("Cannot connect to HPC. Please check SSH configuration.")
-        return None
-    
-    # Get HPC paths and resolve environment variables
-    # SLURM batch jobs don't have access to login shell environment variables like $GLOBALSCRATCH,
-    # so we resolve them now to their actual paths
-    hpc_rawdata = getattr(args, 'hpc_rawdata', None) or '$GLOBALSCRATCH/rawdata'
-    hpc_derivatives = getattr(args, 'hpc_derivatives', None) or '$GLOBALSCRATCH/derivatives'
-    hpc_apptainer_dir = args.hpc_apptainer_dir or '$GLOBALSCRATCH/apptainer'
+    if tool_context is None:
+        # Test SSH connection
+        if not test_ssh_connection(username, hostname, keyfile, gateway):
+            logger.error("Cannot connect to HPC. Please check SSH configuration.")
+            return None
+        tool_context = prepare_tool_context(tool, dataset, args, *_resolve_hpc_paths(args))
     
-    # Resolve environment variables to actual paths
-    hpc_rawdata = resolve_hpc_env_var(hpc_rawdata, username, hostname, keyfile, gateway)
-    hpc_derivatives = resolve_hpc_env_var(hpc_derivatives, username, hostname, keyfile, gateway)
-    hpc_apptainer_dir = resolve_hpc_env_var(hpc_apptainer_dir, username, hostname, keyfile, gateway)
+    hpc_rawdata = tool_context['hpc_rawdata']
+    hpc_derivatives = tool_context['hpc_derivatives']
     
-    if not check_required_data(tool, dataset, participant_label, args, username, hostname, 
+    if not check_required_data(tool, dataset, participant_label, args, username, hostname,
                                keyfile, gateway, hpc_rawdata, hpc_derivatives):
         logger.error("Required data not available on HPC. Job submission cancelled.")
         return None
     
-    # Generate HPC script with resolved paths
-    script_content = generate_hpc_script(
-        tool=tool,
-        participant_label=participant_label,
-        dataset=dataset,
-        args=args,
-        hpc_rawdata=hpc_rawdata,
-        hpc_derivatives=hpc_derivatives,
-        hpc_apptainer_dir=hpc_apptainer_dir
-    )
+    # Look up the T1w image now rather than searching for it at job start
+    if t1w_files is None and tool in ("freesurfer", "fastsurfer"):
+        t1w_files = find_remote_t1w_files(hpc_rawdata, dataset, username, hostname, keyfile, gateway)
     
-    # Create temporary script file
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.sh', delete=False) as f:
-        f.write(script_content)
-        local_script = f.name
+    script_content = render_hpc_script(tool_context, participant_label, t1w_files=t1w_files)
     
     try:
-        # Create remote directory for job scripts
+        # Stream the script to sbatch over stdin in a single SSH call. It is
+        # submitted from the job directory (where SLURM writes the logs) and
+        # a copy is kept there via tee.
         remote_dir = f"~/ln2t_hpc_jobs/{dataset}"
-        ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [f"mkdir -p {remote_dir}"]
-        subprocess.run(ssh_cmd, check=True, capture_output=True)
-        
-        # Copy script to HPC
         remote_script = f"{remote_dir}/{tool}_{participant_label}.sh"
-        logger.info(f"Copying job script to {username}@{hostname}:{remote_script}")
-        scp_cmd = get_scp_command(username, hostname, keyfile, gateway) + [
-            local_script, f"{username}@{hostname}:{remote_script}"
-        ]
-        subprocess.run(scp_cmd, check=True, capture_output=True)
-        
-        # Submit job
-        logger.info("Submitting job to HPC...")
+        quoted_dir = _quote_remote_path(remote_dir)
+        logger.info(f"Submitting job to HPC ({username}@{hostname}:{remote_script})...")
         ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
-            f"cd {remote_dir} && sbatch {tool}_{participant_label}.sh"
+            f"mkdir -p {quoted_dir} && cd {quoted_dir} && "
+            f"tee {shlex.quote(f'{tool}_{participant_label}.sh')} | sbatch --parsable"
         ]
-        result = subprocess.run(ssh_cmd, capture_output=True, text=True, check=True)
+        result = subprocess.run(ssh_cmd, input=script_content, capture_output=True, text=True, check=True)
         
-        # Parse job ID - check both stdout and stderr since output may vary
+        # --parsable prints "<jobid>" or "<jobid>;<cluster>"
         output = result.stdout.strip()
         stderr = result.stderr.strip()
         logger.debug(f"sbatch stdout: {output!r}")
         logger.debug(f"sbatch stderr: {stderr!r}")
         
-        # Look for job ID in stdout first, then stderr
-        # Format can be "Submitted batch job 224780" or "Submitted batch job 224780 on cluster lyra"
-        job_id = None
-        for text in [output, stderr]:
-            if "Submitted batch job" in text:
-                # Extract job ID - it's the number after "Submitted batch job"
-                match = re.search(r'Submitted batch job (\d+)', text)
-                if match:
-                    job_id = match.group(1)
-                    break
+        job_ids = _parse_sbatch_parsable(output)
+        job_id = job_ids[0] if job_ids else None
         
         if job_id:
             logger.info(f"✓ Job submitted successfully! Job ID: {job_id}")
@@ -1635,8 +3307,120 @@ def submit_hpc_job(
     except subprocess.CalledProcessError as e:
         logger.error(f"Failed to submit HPC job: {e.stderr}")
         return None
-    finally:
-        Path(local_script).unlink(missing_ok=True)
+
+
+def submit_array_job(
+    tool: str,
+    participant_labels: List[str],
+    dataset: str,
+    args: Any
+) -> List[str]:
+    """Submit one SLURM array job covering several participants.
+    
+    One script (with the participant list embedded) is streamed to sbatch
+    in a single SSH call; SLURM itself throttles how many tasks
+    run at once (--hpc-array-concurrency).
+    
+    Parameters
+    ----------
+    tool : str
+        Tool name
+    participant_labels : List[str]
+        Participant labels, one array task each
+    dataset : str
+        Dataset name
+    args : Any
+        Arguments namespace
+        
+    Returns
+    -------
+    List[str]
+        Array task IDs ('<jobid>_<index>'), in participant order; empty if
+        the HPC is unreachable or required data is missing
+        
+    Raises
+    ------
+    subprocess.CalledProcessError
+        If the sbatch call fails
+    """
+    logger.info(f"Preparing HPC array job for {tool} on {len(participant_labels)} participants...")
+    
+    validate_hpc_config(args)
+    
+    username = args.hpc_username
+    hostname = args.hpc_hostname
+    keyfile = args.hpc_keyfile
+    gateway = getattr(args, 'hpc_gateway', None)
+    
+    if not test_ssh_connection(username, hostname, keyfile, gateway):
+        logger.error("Cannot connect to HPC. Please check SSH configuration.")
+        return []
+    
+    hpc_rawdata, hpc_derivatives, hpc_apptainer_dir = _resolve_hpc_paths(args)
+    
+    data_checks = check_required_data_many(tool, dataset, participant_labels, args, username, hostname,
+                                           keyfile, gateway, hpc_rawdata, hpc_derivatives)
+    if not all(data_ready for _, data_ready in data_checks):
+        logger.error("Required data not available on HPC. Job submission cancelled.")
+        return []
+    
+    t1w_files = None
+    if tool in ("freesurfer", "fastsurfer"):
+        t1w_files = find_remote_t1w_files(hpc_rawdata, dataset, username, hostname, keyfile, gateway)
+    
+    script_content = generate_hpc_script(
+        tool=tool,
+        participant_label=participant_labels[0],
+        dataset=dataset,
+        args=args,
+        hpc_rawdata=hpc_rawdata,
+        hpc_derivatives=hpc_derivatives,
+        hpc_apptainer_dir=hpc_apptainer_dir,
+        array_participants=participant_labels,
+        t1w_files=t1w_files
+    )
+    
+    # Stream the script to sbatch over stdin, as submit_hpc_job does, so no
+    # local temporary file is needed; a copy is kept in the job directory
+    quoted_dir = _quote_remote_path(f"~/ln2t_hpc_jobs/{dataset}")
+    ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+        f"mkdir -p {quoted_dir} && cd {quoted_dir} && "
+        f"tee {shlex.quote(f'{tool}_array.sh')} | sbatch --parsable"
+    ]
+    result = submit_with_rate_limit(
+        subprocess.run, getattr(args, 'hpc_submit_sleep', 1.0),
+        ssh_cmd, input=script_content, capture_output=True, text=True, check=True
+    )
+    logger.debug(f"sbatch stdout: {result.stdout!r}")
+    logger.debug(f"sbatch stderr: {result.stderr!r}")
+    
+    array_ids = _parse_sbatch_parsable(result.stdout)
+    if not array_ids:
+        raise subprocess.CalledProcessError(result.returncode, ssh_cmd, result.stdout, result.stderr)
+    array_id = array_ids[0]
+    job_ids = [f"{array_id}_{index}" for index in range(1, len(participant_labels) + 1)]
+    logger.info(f"✓ Array job submitted successfully! Job ID: {array_id} ({len(job_ids)} tasks)")
+    
+    # Save one entry per task for status tracking
+    try:
+        from ln2t_tools.utils.hpc_status import JobInfo, save_job_info
+        from datetime import datetime
+        
+        submit_time = datetime.now().isoformat()
+        for job_id, participant_label in zip(job_ids, participant_labels):
+            save_job_info(JobInfo(
+                job_id=job_id,
+                tool=tool,
+                dataset=dataset,
+                participant=participant_label,
+                submit_time=submit_time,
+                state="SUBMITTED"
+            ))
+        logger.debug(f"Saved job information for tracking")
+    except Exception as e:
+        logger.debug(f"Could not save job information: {e}")
+    
+    return job_ids
 
 
 def submit_multiple_jobs(
@@ -1646,7 +3430,12 @@ def submit_multiple_jobs(
     args: Any,
     submission_delay: float = 0.5
 ) -> List[str]:
-    """Submit multiple jobs for different participants with staggered timing.
+    """Submit jobs for several participants.
+    
+    Several participants go into one SLURM array job (see
+    :func:`submit_array_job`). A single participant, or a failed array
+    submission, falls back to one job per participant, submitted from a small
+    thread pool with staggered start times.
     
     Parameters
     ----------
@@ -1659,35 +3448,121 @@ def submit_multiple_jobs(
     args : Any
         Arguments namespace
     submission_delay : float
-        Delay in seconds between job submissions to avoid resource conflicts
-        (default: 0.5 seconds)
+        Minimum delay in seconds between job submissions to avoid resource
+        conflicts, overridden by args.hpc_submit_sleep (default: 0.5 seconds)
         
     Returns
     -------
     List[str]
         List of job IDs for submitted jobs
     """
-    job_ids = []
-    
-    logger.info(f"Submitting {len(participant_labels)} jobs (with {submission_delay}s delay between submissions)...")
+    validate_hpc_config(args)
     
-    for i, participant_label in enumerate(participant_labels):
-        job_id = submit_hpc_job(tool, participant_label, dataset, args)
-        if job_id:
-            job_ids.append(job_id)
-        else:
-            logger.warning(f"Failed to submit job for participant {participant_label}")
+    # Keep one multiplexed connection open for all submissions below
+    with ssh_control_master(args.hpc_username, args.hpc_hostname, args.hpc_keyfile,
+                            getattr(args, 'hpc_gateway', None)):
+        if len(participant_labels) > 1:
+            try:
+                return submit_array_job(tool, participant_labels, dataset, args)
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Failed to submit HPC array job: {e.stderr}")
+                logger.warning("Falling back to one job per participant")
+        
+        submission_delay = getattr(args, 'hpc_submit_sleep', submission_delay)
+        max_workers = min(8, len(participant_labels)) or 1
+        
+        if not test_ssh_connection(args.hpc_username, args.hpc_hostname, args.hpc_keyfile,
+                                   getattr(args, 'hpc_gateway', None)):
+            logger.error("Cannot connect to HPC. Please check SSH configuration.")
+            return []
+        
+        # Everything but the participant is shared, so build it once
+        tool_context = prepare_tool_context(tool, dataset, args, *_resolve_hpc_paths(args))
+        t1w_files = None
+        if tool in ("freesurfer", "fastsurfer"):
+            t1w_files = find_remote_t1w_files(tool_context['hpc_rawdata'], dataset, args.hpc_username,
+                                              args.hpc_hostname, args.hpc_keyfile,
+                                              getattr(args, 'hpc_gateway', None))
         
-        # Add delay between submissions to stagger job starts and avoid file locking issues
-        if i < len(participant_labels) - 1:  # No delay after last submission
-            time.sleep(submission_delay)
+        logger.info(f"Submitting {len(participant_labels)} jobs (at most one every {submission_delay}s, "
+                    f"{max_workers} in flight)...")
+        
+        # Each submission mostly waits on SSH round trips over the shared
+        # ControlMaster, so run a few concurrently. Starts are still throttled
+        # to stagger jobs and avoid overloading the scheduler.
+        results: Dict[str, Optional[str]] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    submit_with_rate_limit, submit_hpc_job, submission_delay,
+                    tool, participant_label, dataset, args,
+                    tool_context=tool_context, t1w_files=t1w_files
+                ): participant_label
+                for participant_label in participant_labels
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        
+        # Report in the order participants were given
+        job_ids = []
+        for participant_label in participant_labels:
+            job_id = results.get(participant_label)
+            if job_id:
+                job_ids.append(job_id)
+            else:
+                logger.warning(f"Failed to submit job for participant {participant_label}")
+        
+        return job_ids
+
+
+def _write_download_filter(name: str, participant_labels: List[str]) -> Path:
+    """Write the rsync filter rules selecting some participants' outputs.
     
-    return job_ids
+    Each participant's directory and top-level files (e.g. sub-01.html) are
+    included, other participants are excluded without being traversed, and
+    dataset-level files are kept. The file name carries a hash of the
+    participant list, so a later submission for the same dataset and tool
+    does not change what an earlier printed command downloads.
+    
+    Parameters
+    ----------
+    name : str
+        File name stem, e.g. '<dataset>-<tool>_<version>'
+    participant_labels : List[str]
+        Participant labels (without 'sub-' prefix)
+    
+    Returns
+    -------
+    Path
+        Path to the filter file (under ~/.ln2t_tools/downloads)
+    """
+    from ln2t_tools.utils.hpc_status import get_job_storage_dir
+    
+    filter_dir = get_job_storage_dir() / "downloads"
+    filter_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha1("\n".join(sorted(participant_labels)).encode()).hexdigest()[:12]
+    filter_file = filter_dir / f"{name}-{digest}.rsync-filter"
+    
+    rules = []
+    for label in participant_labels:
+        rules += [f"+ /sub-{label}/***", f"+ /sub-{label}.*"]
+    rules.append("- /sub-*")
+    filter_file.write_text("\n".join(rules) + "\n")
+    return filter_file
 
 
-def print_download_command(tool: str, dataset: str, args: Any, job_ids: List[str]) -> None:
+def print_download_command(tool: str, dataset: str, args: Any,
+                           job_ids: Optional[List[str]] = None,
+                           participant_labels: Optional[List[str]] = None) -> None:
     """Print command for downloading results from HPC.
     
+    When the submitted participants are known, the command only transfers
+    their outputs (plus the dataset-level files) through an rsync filter
+    file, so rsync never walks the other participants' directories. If
+    nothing has been downloaded yet, a single tar stream over SSH is offered
+    as well: with no local files to compare against, it avoids rsync's
+    per-file overhead on outputs made of many small files.
+    
     Parameters
     ----------
     tool : str
@@ -1696,8 +3571,10 @@ def print_download_command(tool: str, dataset: str, args: Any, job_ids: List[str
         Dataset name
     args : Any
         Arguments namespace
-    job_ids : List[str]
+    job_ids : Optional[List[str]]
         List of job IDs
+    participant_labels : Optional[List[str]]
+        Participants whose outputs to download (default: everything)
     """
     username = args.hpc_username
     hostname = args.hpc_hostname
@@ -1708,43 +3585,58 @@ def print_download_command(tool: str, dataset: str, args: Any, job_ids: List[str
     # Resolve environment variables in the path
     hpc_derivatives = resolve_hpc_env_var(hpc_derivatives, username, hostname, keyfile, gateway)
     
-    # Determine version and output directory
-    from ln2t_tools.utils.defaults import DEFAULT_QSIPREP_VERSION
-    version = getattr(args, 'version', {
-        'freesurfer': '7.3.2',
-        'fmriprep': '25.1.4',
-        'qsiprep': DEFAULT_QSIPREP_VERSION,
-        'qsirecon': '1.1.1',
-        'meld_graph': 'v2.2.3',
-        'cvrmap': '4.3.1'
-    }.get(tool, ''))
+    # Determine version and output directory (same fallback as the job scripts)
+    version = getattr(args, 'version', None) or _HPC_FALLBACK_VERSIONS.get(tool, '')
     
     remote_path = f"{hpc_derivatives}/{dataset}-derivatives/{tool}_{version}/"
     local_path = f"~/derivatives/{dataset}-derivatives/{tool}_{version}/"
     
-    # Build rsync command with actual keyfile path
-    keyfile_expanded = str(Path(keyfile).expanduser())
-    if gateway:
-        proxy_cmd = f"-e 'ssh -i {keyfile_expanded} -J {username}@{gateway}'"
-    else:
-        proxy_cmd = f"-e 'ssh -i {keyfile_expanded}'"
-    
-    rsync_cmd = f"rsync -avz --progress {proxy_cmd} {username}@{hostname}:{remote_path} {local_path}"
+    # The generated SSH config carries the key, ProxyJump and cipher settings.
+    # --whole-file skips the delta scan, which buys nothing for new outputs;
+    # no -z, as most outputs (.nii.gz, .mgz) are already compressed.
+    ssh_config = _get_ssh_config(username, hostname, keyfile, gateway)
+    rsync_options = "-a --whole-file --inplace --info=progress2,stats2"
+    bwlimit = getattr(args, 'hpc_bwlimit', None)
+    if bwlimit:
+        rsync_options += f" --bwlimit={bwlimit}"
+    if participant_labels:
+        filter_file = _write_download_filter(f"{dataset}-{tool}_{version}", participant_labels)
+        rsync_options += f" --filter='merge {filter_file}'"
+    rsync_cmd = f"rsync {rsync_options} -e 'ssh -F {ssh_config}' {_SSH_HOST_ALIAS}:{remote_path} {local_path}"
+    
+    tar_cmd = None
+    if not Path(local_path).expanduser().exists():
+        # Same selection as the rsync filter: top-level entries other than
+        # sub-*, plus the requested participants
+        selection = ""
+        if participant_labels:
+            selection = " ! -name 'sub-*'" + "".join(
+                f" -o -name {shlex.quote(f'sub-{label}')} -o -name {shlex.quote(f'sub-{label}.*')}"
+                for label in participant_labels
+            )
+        remote_cmd = (f"cd {_quote_remote_path(remote_path)} && "
+                      f"find . -mindepth 1 -maxdepth 1{selection} | tar -cf - -T -")
+        tar_cmd = (f"mkdir -p {local_path} && ssh -F {ssh_config} {_SSH_HOST_ALIAS} "
+                   f"{shlex.quote(remote_cmd)} | tar -C {local_path} -xf -")
     
     logger.info("")
     logger.info(f"{Colors.GREEN}{Colors.BOLD}{'='*80}{Colors.END}")
     logger.info(f"{Colors.GREEN}{Colors.BOLD}HPC JOB SUBMISSION COMPLETE{Colors.END}")
     logger.info(f"{Colors.GREEN}{Colors.BOLD}{'='*80}{Colors.END}")
-    logger.info(f"\n{Colors.BOLD}Submitted {len(job_ids)} job(s):{Colors.END}")
-    for job_id in job_ids:
-        logger.info(f"  {Colors.CYAN}• Job ID: {job_id}{Colors.END}")
+    if job_ids:
+        logger.info(f"\n{Colors.BOLD}Submitted {len(job_ids)} job(s):{Colors.END}")
+        for job_id in job_ids:
+            logger.info(f"  {Colors.CYAN}• Job ID: {job_id}{Colors.END}")
     
     logger.info(f"\n{Colors.BOLD}To download results when jobs complete, run:{Colors.END}")
     logger.info(f"\n{Colors.YELLOW}{rsync_cmd}{Colors.END}")
+    if tar_cmd:
+        logger.info(f"\n{Colors.BOLD}For a first download, a single tar stream is usually faster:{Colors.END}")
+        logger.info(f"\n{Colors.YELLOW}{tar_cmd}{Colors.END}")
     logger.info(f"\n{Colors.GREEN}{Colors.BOLD}{'='*80}{Colors.END}\n")
 
 
-def check_job_status(job_id: str, username: str, hostname: str, keyfile: str, 
+def check_job_status(job_id: str, username: str, hostname: str, keyfile: str,
                     gateway: Optional[str] = None) -> Optional[Dict[str, str]]:
     """Check status of HPC job.
     
@@ -1760,28 +3652,16 @@ def check_job_status(job_id: str, username: str, hostname: str, keyfile: str,
         SSH keyfile path
     gateway : Optional[str]
         ProxyJump gateway
-        
+    
     Returns
     -------
     Optional[Dict[str, str]]
-        Job status information or None if error
+        Job status information or None if the job is not queued or on error
     """
-    try:
-        ssh_cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
-            f"squeue -j {job_id} --format='%T|%M|%L'"
-        ]
-        result = subprocess.run(ssh_cmd, capture_output=True, text=True, timeout=10)
-        
-        if result.returncode == 0:
-            lines = result.stdout.strip().split('\n')
-            if len(lines) > 1:
-                state, time_used, time_left = lines[1].split('|')
-                return {
-                    'state': state,
-                    'time_used': time_used,
-                    'time_left': time_left
-                }
-        return None
-    except Exception as e:
-        logger.error(f"Error checking job status: {e}")
+    # One squeue parser for everything (array tasks, several jobs per call)
+    from ln2t_tools.utils.hpc_status import query_squeue_statuses
+    
+    status = query_squeue_statuses([job_id], username, hostname, keyfile, gateway).get(str(job_id))
+    if status is None:
         return None
+    return {key: status[key] for key in ('state', 'time_used', 'time_left')}
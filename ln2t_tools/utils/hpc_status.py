@@ -7,7 +7,9 @@ job history across multiple sessions.
 import json
 import logging
 import re
+import shlex
 import subprocess
+import threading
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
@@ -16,6 +18,9 @@ from dataclasses import dataclass, asdict, field
 
 logger = logging.getLogger(__name__)
 
+# Serializes read-modify-write of the job storage file across submitter threads
+_jobs_file_lock = threading.Lock()
+
 
 class JobState(Enum):
     """SLURM job states."""
@@ -122,25 +127,26 @@ def save_job_info(job_info: JobInfo) -> None:
     job_dir = get_job_storage_dir()
     jobs_file = job_dir / "hpc_jobs.json"
     
-    # Load existing jobs
-    jobs = {}
-    if jobs_file.exists():
+    with _jobs_file_lock:
+        # Load existing jobs
+        jobs = {}
+        if jobs_file.exists():
+            try:
+                with open(jobs_file, 'r') as f:
+                    jobs = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Could not read job storage file: {e}")
+                jobs = {}
+        
+        # Update or add job
+        jobs[job_info.job_id] = job_info.to_dict()
+        
+        # Save back
         try:
-            with open(jobs_file, 'r') as f:
-                jobs = json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            logger.warning(f"Could not read job storage file: {e}")
-            jobs = {}
-    
-    # Update or add job
-    jobs[job_info.job_id] = job_info.to_dict()
-    
-    # Save back
-    try:
-        with open(jobs_file, 'w') as f:
-            json.dump(jobs, f, indent=2)
-    except IOError as e:
-        logger.warning(f"Could not save job information: {e}")
+            with open(jobs_file, 'w') as f:
+                json.dump(jobs, f, indent=2)
+        except IOError as e:
+            logger.warning(f"Could not save job information: {e}")
 
 
 def load_all_jobs() -> Dict[str, JobInfo]:
@@ -225,6 +231,110 @@ def get_jobs_for_tool(tool: str) -> List[JobInfo]:
     return [job for job in jobs.values() if job.tool == tool]
 
 
+def _requested_job_id(reported_id: str, requested: set) -> Optional[str]:
+    """Map a job ID printed by squeue/sacct back to the ID that was asked for.
+    
+    Array tasks are reported as '<array id>_<task>' (squeue -r and
+    sacct --array list pending tasks one per line too), job steps as
+    '<id>.<step>'; steps are ignored.
+    
+    Parameters
+    ----------
+    reported_id : str
+        JobID column of the squeue/sacct output
+    requested : set
+        Job IDs passed to -j
+    
+    Returns
+    -------
+    Optional[str]
+        Requested job ID the line belongs to, or None
+    """
+    if '.' in reported_id:
+        return None
+    if reported_id in requested:
+        return reported_id
+    array_id = reported_id.split('_', 1)[0]
+    return array_id if array_id in requested else None
+
+
+def query_squeue_statuses(
+    job_ids: List[str],
+    username: str,
+    hostname: str,
+    keyfile: str,
+    gateway: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Query squeue once for the status of several jobs.
+    
+    Parameters
+    ----------
+    job_ids : List[str]
+        SLURM job IDs
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH key path
+    gateway : Optional[str]
+        ProxyJump gateway
+    
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        Job status dict per job ID; jobs no longer queued are left out
+    """
+    from .hpc import get_ssh_command
+    
+    requested = {str(job_id) for job_id in job_ids}
+    if not requested:
+        return {}
+    
+    try:
+        # Query running jobs with squeue, all in one call. -r lists pending
+        # array tasks one per line instead of as a single '<id>_[2-10%4]'.
+        cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
+            f"squeue -r -j {shlex.quote(','.join(sorted(requested)))} "
+            f"--format='%i|%T|%S|%e|%M|%L' --noheader"
+        ]
+        
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    except subprocess.TimeoutExpired:
+        logger.warning(f"Timeout querying squeue for {len(requested)} job(s)")
+        return {}
+    except Exception as e:
+        logger.debug(f"Error querying squeue: {e}")
+        return {}
+    
+    if result.returncode == 255:
+        logger.debug(f"squeue query failed: {result.stderr}")
+        return {}
+    
+    # Jobs that left the queue are simply missing from the output (squeue
+    # exits non-zero when a single unknown job is asked for, so the return
+    # code says nothing about the others)
+    statuses: Dict[str, Dict[str, Any]] = {}
+    for line in result.stdout.splitlines():
+        # Parse squeue output: job_id|state|start_time|end_time|time_used|time_left
+        parts = line.strip().split('|')
+        if len(parts) < 2:
+            continue
+        job_id = _requested_job_id(parts[0], requested)
+        if job_id is None or job_id in statuses:
+            continue
+        statuses[job_id] = {
+            'job_id': parts[0],
+            'state': parts[1],
+            'start_time': parts[2] if len(parts) > 2 else None,
+            'end_time': parts[3] if len(parts) > 3 else None,
+            'time_used': parts[4] if len(parts) > 4 else None,
+            'time_left': parts[5] if len(parts) > 5 else None,
+        }
+    
+    return statuses
+
+
 def query_squeue_status(
     job_id: str,
     username: str,
@@ -246,46 +356,94 @@ def query_squeue_status(
         SSH key path
     gateway : Optional[str]
         ProxyJump gateway
-        
+    
     Returns
     -------
     Optional[Dict[str, Any]]
         Job status dict or None if not found
     """
+    return query_squeue_statuses([job_id], username, hostname, keyfile, gateway).get(str(job_id))
+
+
+def query_sacct_statuses(
+    job_ids: List[str],
+    username: str,
+    hostname: str,
+    keyfile: str,
+    gateway: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Query sacct once for the status of several finished jobs.
+    
+    Parameters
+    ----------
+    job_ids : List[str]
+        SLURM job IDs
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH key path
+    gateway : Optional[str]
+        ProxyJump gateway
+    
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        Job status dict per job ID; unknown jobs are left out
+    """
     from .hpc import get_ssh_command
     
+    requested = {str(job_id) for job_id in job_ids}
+    if not requested:
+        return {}
+    
     try:
-        # Query running jobs with squeue
+        # Query job accounting with sacct (--array: one line per array task)
+        # Format: jobid|state|exitcode|reason|start|end|elapsed
         cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
-            f"squeue -j {job_id} --format='%i:%T:%S:%e' --noheader"
+            f"sacct --array -j {shlex.quote(','.join(sorted(requested)))} "
+            f"--format='JobID,State,ExitCode,Reason,Start,End,Elapsed' --parsable2 --noheader"
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        
-        if result.returncode != 0:
-            return None  # Job not found in queue
-        
-        output = result.stdout.strip()
-        if not output:
-            return None
-        
-        # Parse squeue output: job_id:state:start_time:end_time
-        parts = output.split(':')
-        if len(parts) >= 2:
-            return {
-                'job_id': parts[0],
-                'state': parts[1],
-                'start_time': parts[2] if len(parts) > 2 else None,
-                'end_time': parts[3] if len(parts) > 3 else None,
-            }
-        
-        return None
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
     except subprocess.TimeoutExpired:
-        logger.warning(f"Timeout querying squeue for job {job_id}")
-        return None
+        logger.warning(f"Timeout querying sacct for {len(requested)} job(s)")
+        return {}
     except Exception as e:
-        logger.debug(f"Error querying squeue: {e}")
-        return None
+        logger.debug(f"Error querying sacct: {e}")
+        return {}
+    
+    if result.returncode != 0:
+        logger.debug(f"sacct query failed: {result.stderr}")
+        return {}
+    
+    # Each job is followed by its steps (<id>.batch, ...), which are skipped
+    statuses: Dict[str, Dict[str, Any]] = {}
+    for line in result.stdout.splitlines():
+        parts = line.strip().split('|')
+        if len(parts) < 5:
+            continue
+        job_id = _requested_job_id(parts[0], requested)
+        if job_id is None or job_id in statuses:
+            continue
+        
+        exit_code = parts[2] if parts[2] else None
+        # Extract numeric exit code (format can be "0:0" or "0")
+        if exit_code:
+            exit_code = int(exit_code.split(':')[0])
+        
+        statuses[job_id] = {
+            'job_id': parts[0],
+            'state': parts[1],
+            'exit_code': exit_code,
+            'reason': parts[3] if parts[3] else None,
+            'start_time': parts[4] if len(parts) > 4 else None,
+            'end_time': parts[5] if len(parts) > 5 else None,
+            'elapsed_time': parts[6] if len(parts) > 6 else None,
+        }
+    
+    return statuses
 
 
 def query_sacct_status(
@@ -309,62 +467,64 @@ def query_sacct_status(
         SSH key path
     gateway : Optional[str]
         ProxyJump gateway
-        
+    
     Returns
     -------
     Optional[Dict[str, Any]]
         Job status dict or None if not found
     """
-    from .hpc import get_ssh_command
+    return query_sacct_statuses([job_id], username, hostname, keyfile, gateway).get(str(job_id))
+
+
+def check_jobs_status(
+    job_ids: List[str],
+    username: str,
+    hostname: str,
+    keyfile: str,
+    gateway: Optional[str] = None
+) -> Dict[str, Tuple[JobStatus, Dict[str, Any]]]:
+    """Check the status of several jobs with one squeue and one sacct call.
     
-    try:
-        # Query job accounting with sacct
-        # Format: jobid:state:exitcode:reason:start:end:elapsed
-        cmd = get_ssh_command(username, hostname, keyfile, gateway) + [
-            f"sacct -j {job_id} --format='JobID,State,ExitCode,Reason,Start,End,Elapsed' "
-            f"--parsable2 --noheader"
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        
-        if result.returncode != 0:
-            logger.debug(f"sacct query failed for job {job_id}: {result.stderr}")
-            return None
-        
-        output = result.stdout.strip()
-        if not output:
-            return None
-        
-        # Parse sacct output (first line is the job, subsequent lines are steps)
-        lines = output.split('\n')
-        if not lines:
-            return None
-        
-        # Parse first line (main job)
-        parts = lines[0].split('|')
-        if len(parts) >= 5:
-            exit_code = parts[2] if parts[2] else None
-            # Extract numeric exit code (format can be "0:0" or "0")
-            if exit_code:
-                exit_code = int(exit_code.split(':')[0])
-            
-            return {
-                'job_id': parts[0],
-                'state': parts[1],
-                'exit_code': exit_code,
-                'reason': parts[3] if parts[3] else None,
-                'start_time': parts[4] if len(parts) > 4 else None,
-                'end_time': parts[5] if len(parts) > 5 else None,
-                'elapsed_time': parts[6] if len(parts) > 6 else None,
-            }
-        
-        return None
-    except subprocess.TimeoutExpired:
-        logger.warning(f"Timeout querying sacct for job {job_id}")
-        return None
-    except Exception as e:
-        logger.debug(f"Error querying sacct: {e}")
-        return None
+    Jobs still known to squeue (pending/running) are reported from there;
+    sacct is only asked about the rest.
+    
+    Parameters
+    ----------
+    job_ids : List[str]
+        SLURM job IDs
+    username : str
+        HPC username
+    hostname : str
+        HPC hostname
+    keyfile : str
+        SSH key path
+    gateway : Optional[str]
+        ProxyJump gateway
+    
+    Returns
+    -------
+    Dict[str, Tuple[JobStatus, Dict[str, Any]]]
+        Status category and detailed status info per job ID
+    """
+    job_ids = [str(job_id) for job_id in job_ids]
+    statuses: Dict[str, Tuple[JobStatus, Dict[str, Any]]] = {}
+    
+    # First try squeue (running jobs)
+    for job_id, status_info in query_squeue_statuses(job_ids, username, hostname, keyfile, gateway).items():
+        state = status_info.get('state', 'UNKNOWN').upper()
+        statuses[job_id] = (_state_to_status(state, None), status_info)
+    
+    # Jobs not in squeue: try sacct (finished jobs)
+    finished = [job_id for job_id in job_ids if job_id not in statuses]
+    for job_id, status_info in query_sacct_statuses(finished, username, hostname, keyfile, gateway).items():
+        state = status_info.get('state', 'UNKNOWN').upper()
+        statuses[job_id] = (_state_to_status(state, status_info.get('reason')), status_info)
+    
+    # Jobs not found anywhere
+    for job_id in job_ids:
+        statuses.setdefault(job_id, (JobStatus.ERROR, {'state': 'NOT_FOUND'}))
+    
+    return statuses
 
 
 def check_job_status(
@@ -377,6 +537,7 @@ def check_job_status(
     """Check status of a job on HPC cluster.
     
     Queries both squeue (running jobs) and sacct (historical jobs).
+    See :func:`check_jobs_status` to check many jobs at once.
     
     Parameters
     ----------
@@ -390,30 +551,13 @@ def check_job_status(
         SSH key path
     gateway : Optional[str]
         ProxyJump gateway
-        
+    
     Returns
     -------
     Tuple[JobStatus, Dict[str, Any]]
         Status category and detailed status info
     """
-    # First try squeue (running jobs)
-    status_info = query_squeue_status(job_id, username, hostname, keyfile, gateway)
-    
-    if status_info:
-        state = status_info.get('state', 'UNKNOWN').upper()
-        return _state_to_status(state, None), status_info
-    
-    # If not in squeue, try sacct (finished jobs)
-    status_info = query_sacct_status(job_id, username, hostname, keyfile, gateway)
-    
-    if status_info:
-        state = status_info.get('state', 'UNKNOWN').upper()
-        exit_code = status_info.get('exit_code')
-        reason = status_info.get('reason')
-        return _state_to_status(state, reason), status_info
-    
-    # Job not found
-    return JobStatus.ERROR, {'state': 'NOT_FOUND'}
+    return check_jobs_status([job_id], username, hostname, keyfile, gateway)[str(job_id)]
 
 
 def _state_to_status(state: str, reason: Optional[str]) -> JobStatus:
@@ -1,6 +1,7 @@
 import os
 import shutil
 import logging
+import functools
 import time
 import fcntl
 import signal
@@ -9,8 +10,10 @@ import json
 import socket
 import getpass
 import re
+import shlex
+import weakref
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from warnings import warn
 import subprocess
 
@@ -21,11 +24,116 @@ from ln2t_tools.utils.defaults import (
     DEFAULT_DERIVATIVES,
     DEFAULT_CODE,
     MAX_PARALLEL_INSTANCES,
-    LOCKFILE_DIR
+    LOCKFILE_DIR,
+    TOOL_DOCKER_OWNERS
 )
 
 logger = logging.getLogger(__name__)
 
+# Instance managers holding a lock, released together on exit or signal.
+# The handlers are installed once per process rather than per lock.
+_lock_holders: "weakref.WeakSet[InstanceManager]" = weakref.WeakSet()
+_SIGNALS_INSTALLED = False
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a process exists.
+    
+    Signal 0 is used rather than looking up /proc/<pid>, which is hidden
+    for other users' processes when /proc is mounted with hidepid.
+    
+    Args:
+        pid: Process ID
+    
+    Returns:
+        True if the process exists, even if it belongs to another user
+    """
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        # Exists, but owned by another user
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _lock_held(lock_file) -> Optional[bool]:
+    """Check whether an instance lock file is still locked by its owner.
+    
+    Each instance holds an exclusive flock on its lock file for as long as
+    it runs, and the kernel drops it when the process exits. Unlike a PID
+    check, this cannot be fooled by the PID being reused by another process.
+    
+    Args:
+        lock_file: Lock file opened for reading
+    
+    Returns:
+        True if locked, False if free, None if flock is not supported there
+    """
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    except OSError:
+        return None
+    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    return False
+
+
+def _open_registry(path: Path) -> int:
+    """Open the registry file shared by all users' instances, for flock.
+    
+    It is opened read-only, which is all flock needs, so a registry created
+    by another user (0644 under the usual umask) is still usable; a new one
+    is made writable by everyone. O_CREAT is only used with O_EXCL: opening
+    another user's file with O_CREAT in a sticky directory such as /tmp
+    fails when fs.protected_regular is set.
+    
+    Args:
+        path: Registry file
+    
+    Returns:
+        File descriptor
+    """
+    try:
+        return os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        pass
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    except FileExistsError:
+        # Created by another instance in the meantime
+        return os.open(path, os.O_RDONLY)
+    # The umask applied to the mode above
+    os.fchmod(fd, 0o666)
+    return fd
+
+
+def _release_all_instance_locks() -> None:
+    """Release the locks of all instance managers of this process."""
+    for manager in list(_lock_holders):
+        manager.release_instance_lock()
+
+
+def _signal_handler(signum, frame):
+    """Handle termination signals."""
+    logger.info(f"Received signal {signum}, cleaning up...")
+    _release_all_instance_locks()
+    exit(1)
+
+
+def _install_exit_handlers() -> None:
+    """Register lock cleanup on exit and on SIGTERM/SIGINT, once per process."""
+    global _SIGNALS_INSTALLED
+    if _SIGNALS_INSTALLED:
+        return
+    atexit.register(_release_all_instance_locks)
+    signal.signal(signal.SIGTERM, _signal_handler)
+    signal.signal(signal.SIGINT, _signal_handler)
+    _SIGNALS_INSTALLED = True
+
+
 class InstanceManager:
     """Manages parallel instances of ln2t_tools to prevent resource overload."""
     
@@ -35,6 +143,11 @@ class InstanceManager:
         self.lockfile_dir.mkdir(exist_ok=True)
         self.lockfile_path = None
         self.lock_fd = None
+        # Result of the last lock directory scan, reused for a few seconds
+        # by the informational queries
+        self._active_locks: Dict[Path, Dict] = {}
+        self._last_cleanup = 0.0
+        self._cleanup_ttl = 5.0
         
     def acquire_instance_lock(self, dataset: str = None, tool: str = None, participants: List[str] = None) -> bool:
         """Acquire a lock for this instance.
@@ -47,22 +160,44 @@ class InstanceManager:
         Returns:
             True if lock acquired successfully, False if max instances reached
         """
-        # Clean up stale lock files first
-        self._cleanup_stale_locks()
-        
-        # Count current active instances
-        active_locks = list(self.lockfile_dir.glob("ln2t_tools_*.lock"))
-        
-        if len(active_locks) >= self.max_instances:
-            logger.warning(f"Maximum number of instances ({self.max_instances}) already running")
+        # Hold the registry lock while counting and creating, so two
+        # instances starting together cannot both take the last slot
+        registry_fd = None
+        try:
+            registry_fd = _open_registry(self.lockfile_dir / "ln2t_tools.registry")
+            fcntl.flock(registry_fd, fcntl.LOCK_EX)
+        except (IOError, OSError) as e:
+            # e.g. the shared lock directory is not writable
+            logger.error(f"Failed to acquire lock: {e}")
+            if registry_fd is not None:
+                os.close(registry_fd)
             return False
         
+        try:
+            # Clean up stale lock files and count the remaining ones
+            active_locks = self._cleanup_stale_locks(force=True)
+            
+            if len(active_locks) >= self.max_instances:
+                logger.warning(f"Maximum number of instances ({self.max_instances}) already running")
+                return False
+            
+            return self._create_lock(dataset, tool, participants)
+        finally:
+            os.close(registry_fd)
+    
+    def _create_lock(self, dataset: Optional[str], tool: Optional[str],
+                     participants: Optional[List[str]]) -> bool:
+        """Create and lock this instance's lock file."""
         # Create lock file for this instance using PID
         pid = os.getpid()
         self.lockfile_path = self.lockfile_dir / f"ln2t_tools_{pid}.lock"
+        # Locked and written under a name the cleanup scan ignores, then
+        # renamed into place (the flock follows the open file), so other
+        # instances never see an empty or half-written lock file
+        tmp_path = self.lockfile_dir / f".ln2t_tools_{pid}.lock.tmp"
         
         try:
-            self.lock_fd = open(self.lockfile_path, 'w')
+            self.lock_fd = open(tmp_path, 'w')
             fcntl.flock(self.lock_fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
             
             # Create lock data structure
@@ -77,14 +212,15 @@ class InstanceManager:
                 "lock_file": self.lockfile_path.name
             }
             
-            # Write JSON data to lock file
-            json.dump(lock_data, self.lock_fd, indent=2)
+            # Write JSON data to lock file (compact: only read back by us)
+            json.dump(lock_data, self.lock_fd, separators=(',', ':'))
             self.lock_fd.flush()
+            os.replace(tmp_path, self.lockfile_path)
+            self._active_locks[self.lockfile_path] = lock_data
             
             # Register cleanup on exit
-            atexit.register(self.release_instance_lock)
-            signal.signal(signal.SIGTERM, self._signal_handler)
-            signal.signal(signal.SIGINT, self._signal_handler)
+            _lock_holders.add(self)
+            _install_exit_handlers()
             
             logger.info(f"Acquired instance lock: {self.lockfile_path.name}")
             return True
@@ -93,6 +229,8 @@ class InstanceManager:
             logger.error(f"Failed to acquire lock: {e}")
             if self.lock_fd:
                 self.lock_fd.close()
+                self.lock_fd = None
+            tmp_path.unlink(missing_ok=True)
             if self.lockfile_path and self.lockfile_path.exists():
                 self.lockfile_path.unlink()
             return False
@@ -113,10 +251,29 @@ class InstanceManager:
                 logger.info(f"Released instance lock: {self.lockfile_path.name}")
             except:
                 pass
+            self._active_locks.pop(self.lockfile_path, None)
             self.lockfile_path = None
+        _lock_holders.discard(self)
     
-    def _cleanup_stale_locks(self) -> None:
-        """Remove lock files from dead processes."""
+    def _cleanup_stale_locks(self, force: bool = False) -> Dict[Path, Dict]:
+        """Remove lock files from dead processes.
+        
+        The lock directory is scanned and each lock file read once; callers
+        use the result instead of globbing and reading the files again. A
+        scan less than ``_cleanup_ttl`` seconds old is reused unless force
+        is set.
+        
+        Args:
+            force: Always rescan (used when acquiring a lock)
+        
+        Returns:
+            Lock data of the remaining (live) instances, by lock file
+        """
+        now = time.monotonic()
+        if not force and now - self._last_cleanup < self._cleanup_ttl:
+            return dict(self._active_locks)
+        
+        active_locks = {}
         for lockfile in self.lockfile_dir.glob("ln2t_tools_*.lock"):
             try:
                 with open(lockfile, 'r') as f:
@@ -124,10 +281,12 @@ class InstanceManager:
                     pid = lock_data.get("pid")
                     
                     if pid:
-                        # Check if process is still running
-                        try:
-                            os.kill(pid, 0)  # Signal 0 checks if process exists
-                        except OSError:
+                        # Check if process is still running: its flock is
+                        # authoritative, the PID is a fallback
+                        held = _lock_held(f)
+                        if held if held is not None else _pid_alive(pid):
+                            active_locks[lockfile] = lock_data
+                        else:
                             # Process is dead, remove stale lock
                             lockfile.unlink()
                             logger.info(f"Removed stale lock file: {lockfile.name}")
@@ -142,12 +301,10 @@ class InstanceManager:
                     logger.info(f"Removed invalid lock file: {lockfile.name}")
                 except:
                     pass
-    
-    def _signal_handler(self, signum, frame):
-        """Handle termination signals."""
-        logger.info(f"Received signal {signum}, cleaning up...")
-        self.release_instance_lock()
-        exit(1)
+        
+        self._active_locks = active_locks
+        self._last_cleanup = now
+        return dict(active_locks)
     
     def get_active_instances(self) -> int:
         """Get the number of currently active instances.
@@ -155,46 +312,46 @@ class InstanceManager:
         Returns:
             Number of active instances
         """
-        self._cleanup_stale_locks()
-        return len(list(self.lockfile_dir.glob("ln2t_tools_*.lock")))
+        return len(self._cleanup_stale_locks())
     
     def list_active_instances(self) -> None:
         """List information about currently active instances."""
-        self._cleanup_stale_locks()
-        lockfiles = list(self.lockfile_dir.glob("ln2t_tools_*.lock"))
+        active_locks = self._cleanup_stale_locks()
         
-        if not lockfiles:
+        if not active_locks:
             logger.info("No active ln2t_tools instances found")
             return
         
-        logger.info(f"Found {len(lockfiles)} active instances:")
-        for i, lockfile in enumerate(lockfiles, 1):
+        logger.info(f"Found {len(active_locks)} active instances:")
+        for i, (lockfile, lock_data) in enumerate(active_locks.items(), 1):
             try:
-                with open(lockfile, 'r') as f:
-                    lock_data = json.load(f)
-                    
-                    pid = lock_data.get("pid", "unknown")
-                    dataset = lock_data.get("dataset", "unknown")
-                    tool = lock_data.get("tool", "unknown")
-                    participants = lock_data.get("participants", [])
-                    hostname = lock_data.get("hostname", "unknown")
-                    user = lock_data.get("user", "unknown")
-                    start_time = lock_data.get("start_time", 0)
-                    
-                    # Calculate duration
-                    duration = time.time() - start_time if start_time else 0
-                    
-                    # Format participant list
-                    participant_str = ", ".join(participants) if participants else "none"
-                    
-                    logger.info(f"  {i}. PID: {pid}, User: {user}@{hostname}")
-                    logger.info(f"      Dataset: {dataset}, Tool: {tool}")
-                    logger.info(f"      Participants: {participant_str}")
-                    logger.info(f"      Running for: {duration:.1f}s, Lock: {lockfile.name}")
-                    
-            except (json.JSONDecodeError, KeyError, Exception) as e:
+                pid = lock_data.get("pid", "unknown")
+                dataset = lock_data.get("dataset", "unknown")
+                tool = lock_data.get("tool", "unknown")
+                participants = lock_data.get("participants", [])
+                hostname = lock_data.get("hostname", "unknown")
+                user = lock_data.get("user", "unknown")
+                start_time = lock_data.get("start_time", 0)
+                
+                # Calculate duration
+                duration = time.time() - start_time if start_time else 0
+                
+                # Format participant list
+                participant_str = ", ".join(participants) if participants else "none"
+                
+                logger.info(f"  {i}. PID: {pid}, User: {user}@{hostname}")
+                logger.info(f"      Dataset: {dataset}, Tool: {tool}")
+                logger.info(f"      Participants: {participant_str}")
+                logger.info(f"      Running for: {duration:.1f}s, Lock: {lockfile.name}")
+                
+            except Exception as e:
                 logger.info(f"  {i}. Lock: {lockfile.name} (error reading: {e})")
 
+@functools.lru_cache(maxsize=4)
+def _which_apptainer(apptainer_path: str) -> Optional[str]:
+    """Resolve the Apptainer executable (memoized; PATH does not change)."""
+    return shutil.which(apptainer_path)
+
 def check_apptainer_is_installed(apptainer_path: str = "/usr/bin/apptainer") -> None:
     """Verify Apptainer is installed and accessible.
     
@@ -204,7 +361,7 @@ def check_apptainer_is_installed(apptainer_path: str = "/usr/bin/apptainer") ->
     Raises:
         FileNotFoundError: If apptainer is not found
     """
-    if not shutil.which(apptainer_path):
+    if not _which_apptainer(apptainer_path):
         raise FileNotFoundError(
             f"Apptainer not found at {apptainer_path}. "
             "Please install Apptainer first."
@@ -228,25 +385,8 @@ def ensure_image_exists(
     Raises:
         FileNotFoundError: If image not found
     """
-    if tool == "freesurfer":
-        tool_owner = "freesurfer"
-    elif tool == "fastsurfer":
-        tool_owner = "deepmi"
-    elif tool == "fmriprep":
-        tool_owner = "nipreps"
-    elif tool == "qsiprep":
-        tool_owner = "pennlinc"
-    elif tool == "qsirecon":
-        tool_owner = "pennlinc"
-    elif tool == "meld_graph":
-        tool_owner = "meldproject"
-    elif tool == "cvrmap":
-        tool_owner = "ln2t"
-    elif tool == "mri2print":
-        tool_owner = "ln2t"
-    elif tool == "bids_validator":
-        tool_owner = "bids"
-    else:
+    tool_owner = TOOL_DOCKER_OWNERS.get(tool)
+    if tool_owner is None:
         raise ValueError(f"Unsupported tool: {tool}")
     
     # Determine the Docker tag to use. For reproducibility callers should
@@ -265,10 +405,11 @@ def ensure_image_exists(
             f"Apptainer image not found: {image_path}\n"
             f"Attempting to build the {tool} image with Docker tag {docker_tag}..."
         )
-        build_cmd = f"apptainer build {image_path} docker://{tool_owner}/{tool}:{docker_tag}"
-        # Use subprocess so we get robust return codes and signals
+        build_cmd = ["apptainer", "build", str(image_path), f"docker://{tool_owner}/{tool}:{docker_tag}"]
+        # Use subprocess so we get robust return codes and signals; no shell
+        # is needed for a fixed argument list
         try:
-            completed = subprocess.run(build_cmd, shell=True)
+            completed = subprocess.run(build_cmd)
             if completed.returncode != 0 or not image_path.exists():
                 raise FileNotFoundError(
                     f"Failed to build Apptainer image: {image_path}\n"
@@ -283,8 +424,10 @@ def ensure_image_exists(
 
 def list_available_datasets() -> None:
     """List available BIDS datasets in rawdata directory."""
-    available = [name[:-8] for name in os.listdir(DEFAULT_RAWDATA) 
-                if name.endswith("-rawdata")]
+    # scandir yields the entry type with each name, so is_dir() needs no stat
+    with os.scandir(DEFAULT_RAWDATA) as entries:
+        available = [entry.name[:-8] for entry in entries
+                     if entry.name.endswith("-rawdata") and entry.is_dir()]
     
     if not available:
         logger.info(f"No datasets found in {DEFAULT_RAWDATA}")
@@ -294,6 +437,23 @@ def list_available_datasets() -> None:
     for dataset in available:
         logger.info(f"  - {dataset}")
 
+@functools.lru_cache(maxsize=8)
+def get_bids_layout(rawdata_dir: Path) -> BIDSLayout:
+    """Index a BIDS rawdata directory, once per directory and run.
+    
+    Building a BIDSLayout walks the whole dataset, which takes seconds to
+    minutes on large datasets; the same dataset is looked up several times
+    per run (participant checks before taking the instance lock, then
+    processing).
+    
+    Args:
+        rawdata_dir: Path to BIDS rawdata directory
+        
+    Returns:
+        BIDSLayout of the dataset
+    """
+    return BIDSLayout(rawdata_dir)
+
 def list_missing_subjects(
     rawdata_dir: Path,
     output_dir: Path
@@ -304,13 +464,16 @@ def list_missing_subjects(
         rawdata_dir: Path to BIDS rawdata directory
         output_dir: Path to derivatives output directory
     """
-    raw_layout = BIDSLayout(rawdata_dir)
+    raw_layout = get_bids_layout(rawdata_dir)
     raw_subjects = set(raw_layout.get_subjects())
     
-    processed_subjects = {
-        d.name[4:] for d in output_dir.glob("sub-*")
-        if d.is_dir()
-    }
+    processed_subjects = set()
+    if output_dir.is_dir():
+        with os.scandir(output_dir) as entries:
+            processed_subjects = {
+                entry.name[4:] for entry in entries
+                if entry.name.startswith("sub-") and entry.is_dir()
+            }
     
     missing = raw_subjects - processed_subjects
     if missing:
@@ -343,9 +506,11 @@ def check_participants_exist(layout, participant_list):
         # If no participants specified, use all available in the dataset
         return layout.get_subjects()
         
+    # Query the layout once, not once per requested participant
+    available_participants = set(layout.get_subjects())
     true_participant_list = []
     for participant in participant_list:
-        if participant in layout.get_subjects():
+        if participant in available_participants:
             true_participant_list.append(participant)
         else:
             warn(f"Participant {participant} not found in the dataset, removing from the list.")
@@ -851,13 +1016,15 @@ def get_additional_contrasts(
     # Remove None values from filters
     filters = {k: v for k, v in filters.items() if v is not None}
     
-    t2w = layout.get(suffix='T2w', return_type='filename', **filters)
-    flair = layout.get(suffix='FLAIR', return_type='filename', **filters)
+    # One index query for both contrasts. Results come sorted by path, so
+    # the first file of each suffix is the one a per-suffix query returns.
+    contrasts = {'t2w': None, 'flair': None}
+    for bids_file in layout.get(suffix=['T2w', 'FLAIR'], **filters):
+        key = bids_file.entities['suffix'].lower()
+        if contrasts[key] is None:
+            contrasts[key] = bids_file.path
     
-    return {
-        't2w': t2w[0] if t2w else None,
-        'flair': flair[0] if flair else None
-    }
+    return contrasts
 
 
 def setup_meld_data_structure(
@@ -999,46 +1166,75 @@ def prepare_meld_input_symlinks(
     Returns:
         True if successful, False otherwise
     """
-    subject_input_dir = meld_input_dir / f"sub-{participant_label}"
-    
-    # Get T1 file
-    t1_files = layout.get(
-        subject=participant_label,
-        suffix='T1w',
-        extension='.nii.gz',
-        return_type='filename'
-    )
-    
-    if not t1_files:
-        logger.warning(f"No T1w found for {participant_label}")
-        return False
+    return prepare_meld_input_symlinks_batch(
+        meld_input_dir, layout, [participant_label]
+    )[participant_label]
+
+
+def prepare_meld_input_symlinks_batch(
+    meld_input_dir: Path,
+    layout: BIDSLayout,
+    participant_labels: List[str]
+) -> Dict[str, bool]:
+    """Create symlinks in MELD input structure for several participants.
     
-    # Create T1 directory and symlink
-    t1_dir = subject_input_dir / "T1"
-    t1_dir.mkdir(parents=True, exist_ok=True)
-    t1_link = t1_dir / "T1.nii.gz"
-    
-    if not t1_link.exists():
-        t1_link.symlink_to(t1_files[0])
-        logger.info(f"Created T1 symlink for {participant_label}")
-    
-    # Get FLAIR if available
-    flair_files = layout.get(
-        subject=participant_label,
-        suffix='FLAIR',
-        extension='.nii.gz',
-        return_type='filename'
-    )
+    T1w and FLAIR images of all participants are fetched with a single
+    index query instead of two per participant.
     
-    if flair_files:
-        flair_dir = subject_input_dir / "FLAIR"
-        flair_dir.mkdir(parents=True, exist_ok=True)
-        flair_link = flair_dir / "FLAIR.nii.gz"
+    Args:
+        meld_input_dir: MELD input directory
+        layout: BIDS layout
+        participant_labels: Subject IDs
         
-        if not flair_link.exists():
-            flair_link.symlink_to(flair_files[0])
+    Returns:
+        Dictionary mapping each subject ID to True if successful, False otherwise
+    """
+    # Results come sorted by path, so the first file of each (subject, suffix)
+    # is the one a per-participant query returns
+    images: Dict[Tuple[str, str], str] = {}
+    for bids_file in layout.get(
+        subject=list(participant_labels),
+        suffix=['T1w', 'FLAIR'],
+        extension='.nii.gz'
+    ):
+        key = (bids_file.entities['subject'], bids_file.entities['suffix'])
+        images.setdefault(key, bids_file.path)
+    
+    prepared = {}
+    for participant_label in participant_labels:
+        t1_file = images.get((participant_label, 'T1w'))
+        if t1_file is None:
+            logger.warning(f"No T1w found for {participant_label}")
+            prepared[participant_label] = False
+            continue
+        
+        subject_input_dir = meld_input_dir / f"sub-{participant_label}"
+        if _symlink_meld_input(subject_input_dir / "T1" / "T1.nii.gz", t1_file):
+            logger.info(f"Created T1 symlink for {participant_label}")
+        
+        # FLAIR is optional
+        flair_file = images.get((participant_label, 'FLAIR'))
+        if flair_file is not None and _symlink_meld_input(
+            subject_input_dir / "FLAIR" / "FLAIR.nii.gz", flair_file
+        ):
             logger.info(f"Created FLAIR symlink for {participant_label}")
+        
+        prepared[participant_label] = True
+    
+    return prepared
+
+
+def _symlink_meld_input(link: Path, target: str) -> bool:
+    """Create a MELD input symlink, keeping an existing one.
     
+    Returns:
+        True if the symlink was created, False if it already existed
+    """
+    link.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        link.symlink_to(target)
+    except FileExistsError:
+        return False
     return True
 
 
@@ -1062,19 +1258,20 @@ def download_meld_weights(
     # Use prepare_classifier.py with --skip-config to avoid interactive prompts
     # This downloads: test data, meld_params, and models
     # Note: --nv flag added for consistency, though GPU not needed for download
-    cmd = (
-        f"apptainer exec "
-        f"--nv "
-        f"-B {meld_data_dir}:/data "
-        f"-B {fs_license}:/license.txt:ro "
-        f"--env FS_LICENSE=/license.txt "
-        f"{apptainer_img} "
-        f"/bin/bash -c 'cd /app && python scripts/new_patient_pipeline/prepare_classifier.py --skip-config'"
-    )
-    
-    logger.info(f"Running: {cmd}")
-    exit_status = os.system(cmd)
-    exit_code = exit_status >> 8
+    cmd = [
+        "apptainer", "exec",
+        "--nv",
+        "-B", f"{meld_data_dir}:/data",
+        "-B", f"{fs_license}:/license.txt:ro",
+        "--env", "FS_LICENSE=/license.txt",
+        str(apptainer_img),
+        "/bin/bash", "-c", "cd /app && python scripts/new_patient_pipeline/prepare_classifier.py --skip-config",
+    ]
+    
+    logger.info(f"Running: {shlex.join(cmd)}")
+    # Run directly rather than through os.system: no intermediate shell, and
+    # the return code is the exit status (negative if killed by a signal)
+    exit_code = subprocess.run(cmd).returncode
     
     if exit_code == 0:
         logger.info("Successfully downloaded MELD Graph weights and parameters")